@@ -1,64 +1,67 @@
+import sys
+import atexit
 import pyxel
 import math
 from random import randint
 import random
-from sauvegarde import save_game_file
-from sauvegarde import load_game_file
+import tempfile
+from sauvegarde import sauvegardeur, changer_dossier, EMPLACEMENT_AUTO, EMPLACEMENT_MANUEL
+from niveaux import grand_chelem, pieces_etape
+import coeur
+from coeur import Plateau, Partie
+from solvabilite import verificateur
+from indice import Indice, ESSAIS_PAR_IMAGE
+from transposition import TableTransposition
+from regions import SuiviRegions
+from catalogue import est_solvable
+from difficulte import series_par_difficulte
+from scenes import GestionnaireScenes
+from particules import Particules, direction
+from profileur import profileur
+from sons import sons
+from rendu import RenduTuiles
+from enregistrement import Enregistreur, Lecteur
+# Images entre deux pieces posees par la completion automatique
+DELAI_AUTO = 12
 width = 12 * 32
 height = 10 * 32 
-pyxel.init(width,height,title="PYTHOMINOES",display_scale=2,fps=30)
+scenes = GestionnaireScenes()
 
 musique = True
 effets = True
+sauvegarde_auto = True
 
 pieces_selectionnees = []
 
 mode_grand_chelem = False    
-grand_chelem = [
-    [2, 3, 6, 11, 8, 4, 5, 10, 9, 1, 7, 12],
-    [2, 3, 7, 9, 8, 5, 6, 4, 10, 1, 12, 11],
-    [2, 4, 6, 7, 8, 1, 3, 9, 11, 5, 12, 10],
-    [3, 4, 6, 7, 8, 1, 5, 2, 11, 10, 12, 9],
-    [3, 6, 7, 9, 10, 2, 12, 11, 4, 1, 5, 8],
-    [2, 3, 5, 6, 4, 9, 11, 10, 8, 12, 1, 7],
-    [2, 3, 5, 7, 8, 1, 9, 10, 12, 4, 11, 6],
-    [2, 3, 6, 10, 11, 8, 9, 12, 4, 1, 7, 5],
-    [2, 3, 6, 8, 5, 11, 9, 7, 12, 10, 1, 4],
-    [2, 4, 5, 8, 7, 10, 6, 1, 12, 9, 11, 3],
-    [3, 4, 5, 10, 9, 1, 6, 11, 8, 12, 7, 2],
-    [2, 6, 7, 9, 11, 3, 8, 4, 5, 10, 12, 1]
-]
 niveau_grand_chelem = 0
 etape = 0
-
-class App:
-    def __init__(self, page_affichée):
-        pyxel.run(page_affichée.update, page_affichée.draw)
+ordre_series = series_par_difficulte()
 
 class MainMenu: 
 
     def __init__(self):
-        pyxel.load("ressources.pyxres")
         if musique :
-            pyxel.playm(0,loop=True)
+            sons.jouer_musique(0)
 
-        self.pieces_cascade_liste = []
+        self.pieces_cascade = Particules(limites=(-32, -32, width, height))
         self.val = randint(1, 12) * 16 + 8
         self.parametres = False
         self.message = "Bienvenue dans Pythominos\n\nAppuyez sur Entree pour jouer\nou sur D pour charger la sauvegarde precedente\nou sur P pour les parametres"
         self.message2 = ""
 
+    def reprendre(self):
+        if musique :
+            sons.jouer_musique(0)
+
     def ajouter_piece_cascade(self):
         if pyxel.frame_count % 5 == 0:
             x_position = randint(0, 12*32)
             piece_val = randint(1, 12) * 16 + 8
-            self.pieces_cascade_liste.append([x_position, 0, piece_val])
+            self.pieces_cascade.emettre(x_position, 0, 0, 2, piece_val)
 
     def pieces_deplacement(self):
-        for piece in self.pieces_cascade_liste.copy():
-            piece[1] += 2
-            if piece[1] > height:
-                self.pieces_cascade_liste.remove(piece)
+        self.pieces_cascade.deplacer()
 
     def update(self):
         global musique
@@ -70,36 +73,38 @@ class MainMenu:
         self.pieces_deplacement()
 
         if pyxel.btnp(pyxel.KEY_P):
-            pyxel.play(3,38)
+            sons.jouer(3, 38)
             self.parametres = not self.parametres
         if self.parametres:
 
             if pyxel.btnp(pyxel.KEY_X):
                 if musique:
-                    pyxel.stop()
-                else :pyxel.playm(0,loop=True)
+                    sons.arreter()
+                else :sons.jouer_musique(0)
                 musique = not musique
             if pyxel.btnp(pyxel.KEY_C):
-                App(Credits())
+                scenes.empiler(Credits())
+                return
 
         else :
             if pyxel.btnp(pyxel.KEY_RETURN):
-                pyxel.play(3,38)
-                App(Choix_du_mode_et_niveaux())
+                sons.jouer(3, 38)
+                scenes.remplacer(Choix_du_mode_et_niveaux())
+                return
 
             if pyxel.btnr(pyxel.KEY_D):
-                pyxel.play(3,38)
-                game_data = load_game_file(filename="../saves/katamino_save.json")
+                sons.jouer(3, 38)
+                game_data = sauvegardeur().charger_plus_recent()
 
                 if game_data:
                     global mode_grand_chelem, niveau_grand_chelem, pieces_selectionnees, plateau, etape
                     mode_grand_chelem = game_data.get("mode_grand_chelem", False)
                     niveau_grand_chelem = game_data.get("niveau_grand_chelem", 0)
                     pieces_selectionnees = game_data.get("pieces_selectionnees", [])
-                    loaded_plateau_data = game_data.get("plateau", [])
                     etape = game_data.get("etape", len(pieces_selectionnees))
-                    new_game_board = Plateau_de_jeu(plateau=loaded_plateau_data, loaded_from_save=True)
-                    App(new_game_board)
+                    new_game_board = Plateau_de_jeu(Plateau(len(pieces_selectionnees)).clear, loaded_from_save=True, placements=game_data["placements"])
+                    scenes.remplacer(new_game_board)
+                    return
                 else:
                     self.message2 = "Echec du chargement"
 
@@ -116,12 +121,8 @@ class MainMenu:
             pyxel.text(36, (5 * 30 + 200) // 2, self.message, 0)
             pyxel.text(36, (5 * 30 + 200) // 2 + 30, self.message2, 6)
 
-            for piece in self.pieces_cascade_liste:
-                if len(piece) >= 3:
-                    piece_val = piece[2]
-                else:
-                    piece_val = self.val
-                pyxel.blt(piece[0], piece[1], 0, piece_val, 16, 16, 16, 0, scale=2.0)
+            with profileur.section("cascade"):
+                self.pieces_cascade.dessiner()
             pyxel.bltm(3*32+16,64,2,0,0,20*8,2*8,colkey=3,scale=2.0)
 
 class Credits:
@@ -129,10 +130,9 @@ class Credits:
         self.message = "Code :\n\nCamille TOUTZEVITCH\nAchille LAFOURCADE\nLeandre MONCORGE\nGabriel ESCHENBRENNER\n\nMusique et effets sonores :\n\nAdrien TOUTZEVITCH"
         self.color_list = [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15]
         self.i = 0
-        pyxel.load('ressources.pyxres')
 
         if musique :
-            pyxel.playm(5,loop=True)
+            sons.jouer_musique(5)
 
     def update(self):
 
@@ -140,8 +140,8 @@ class Credits:
             self.i = (self.i + 1) % 16
 
         if pyxel.btnr(pyxel.KEY_RETURN):
-            pyxel.play(3,38)
-            App(MainMenu())
+            sons.jouer(3, 38)
+            scenes.depiler()
 
     def draw(self):
         pyxel.cls(self.color_list[self.i])
@@ -154,7 +154,7 @@ class Choix_du_mode_et_niveaux:
         global pieces_selectionnees,grand_chelem
 
         self.grand_chelem = grand_chelem
-        pyxel.load("ressources.pyxres")
+        self.ordre_series = ordre_series
         self.mode_grand_chelem = False
         self.mode_libre = False
         self.nom_niveau = "ABCDEFGHIJKL"
@@ -166,30 +166,32 @@ class Choix_du_mode_et_niveaux:
         if self.mode_grand_chelem or self.mode_libre :
 
             if pyxel.btnr(pyxel.KEY_RETURN):
-                pyxel.play(3,38)
+                sons.jouer(3, 38)
 
                 if self.mode_grand_chelem :
                     mode_grand_chelem = True
-                    niveau_grand_chelem = self.selecteur
-                    pieces_selectionnees = [self.grand_chelem[self.selecteur][i]-1 for i in range(4)]
-                    App(Plateau_de_jeu(Plateau(4).clear))
+                    niveau_grand_chelem = self.ordre_series[self.selecteur]
+                    pieces_selectionnees = pieces_etape(niveau_grand_chelem, 4)
+                    scenes.remplacer(Plateau_de_jeu(Plateau(4).clear))
+                    return
 
                 elif self.mode_libre :
-                    App(EcranChoixPieces(self.selecteur+1))
+                    scenes.remplacer(EcranChoixPieces(self.selecteur+1))
+                    return
 
         if pyxel.btnr(pyxel.KEY_G):
-            pyxel.play(3,38)
+            sons.jouer(3, 38)
             self.mode_grand_chelem = True
 
         if pyxel.btnr(pyxel.KEY_L):
-            pyxel.play(3,38)
+            sons.jouer(3, 38)
             self.selecteur = 3
             self.mode_libre = True
 
         if self.mode_grand_chelem or self.mode_libre:
 
             if pyxel.btnp(pyxel.KEY_RIGHT,repeat=20):
-                pyxel.play(3,33)
+                sons.jouer(3, 33)
                 if self.selecteur == 11:
                     if self.mode_grand_chelem :
                         self.selecteur = 0
@@ -199,7 +201,7 @@ class Choix_du_mode_et_niveaux:
                     self.selecteur += 1
 
             if pyxel.btnp(pyxel.KEY_LEFT,repeat=20):
-                pyxel.play(3,33)
+                sons.jouer(3, 33)
                 if self.mode_libre :
                     if self.selecteur == 3:
                         self.selecteur = 11
@@ -215,11 +217,12 @@ class Choix_du_mode_et_niveaux:
         pyxel.cls(1)
 
         if self.mode_grand_chelem :
+            serie = self.ordre_series[self.selecteur]
             for i in range(4):
-                num = self.grand_chelem[self.selecteur][i]
+                num = self.grand_chelem[serie][i]
                 pyxel.bltm((4+i)*32,32*5,0,(num-1)*16,8*8,16,16,0,scale=2.0)
             pyxel.text((4*32-30),85,"Bienvenue dans le mode grand chelem choisissez votre serie",0)
-            pyxel.text(4*32+16,32*4,f"Niveau {self.nom_niveau[self.selecteur]} \nPieces de depart :",0)
+            pyxel.text(4*32+16,32*4,f"Niveau {self.nom_niveau[serie]} (difficulte {self.selecteur+1}/12)\nPieces de depart :",0)
 
         elif self.mode_libre:
             pyxel.text(2*32,130,"Choisissez la taille du plateau puis appuyez sur ENTREE",0)
@@ -240,27 +243,43 @@ class EcranChoixPieces:
         self.liste_piece_choisies = []
         self.position_curseur = 0
         self.nb_pieces = nb_pieces
-        pyxel.load("ressources.pyxres")
         self.etape =len(pieces_selectionnees)
+        self.pieces_impossibles = []
+        self.combinaison_impossible = False
+        self.verifier_catalogue()
+
+    def verifier_catalogue(self):
+        if self.nb_pieces != 0:
+            nb_a_choisir = self.nb_pieces
+        elif self.etape == 0:
+            nb_a_choisir = 4
+        else:
+            nb_a_choisir = 1
+        choix = self.liste_pieces_deja_choisies + self.liste_piece_choisies
+        self.combinaison_impossible = len(self.liste_piece_choisies) == nb_a_choisir and est_solvable(choix) is False
+        if len(self.liste_piece_choisies) == nb_a_choisir - 1:
+            self.pieces_impossibles = [i for i in range(12) if i not in choix and est_solvable(choix + [i]) is False]
+        else:
+            self.pieces_impossibles = []
 
     def update(self):
 
         if pyxel.btnp(pyxel.KEY_RIGHT,repeat=10):
-            pyxel.play(3,33)
+            sons.jouer(3, 33)
             if self.position_curseur == 11:
                 self.position_curseur = 0
             else:
                 self.position_curseur += 1
 
         if pyxel.btnp(pyxel.KEY_LEFT,repeat=10):
-            pyxel.play(3,33)
+            sons.jouer(3, 33)
             if self.position_curseur == 0:
                 self.position_curseur = 11
             else:
                 self.position_curseur -=1
 
         if pyxel.btnp(pyxel.KEY_S):
-            pyxel.play(3,38)
+            sons.jouer(3, 38)
             if self.nb_pieces!=0:
                 if self.position_curseur not in self.liste_piece_choisies:
                     if len(self.liste_piece_choisies) < self.nb_pieces:
@@ -275,22 +294,25 @@ class EcranChoixPieces:
                         if len(self.liste_piece_choisies) < 1:
                             self.liste_piece_choisies.append(self.position_curseur)
 
+            self.verifier_catalogue()
+
         if pyxel.btnp(pyxel.KEY_C):
-            pyxel.play(3,32)
+            sons.jouer(3, 32)
             self.liste_piece_choisies = []
+            self.verifier_catalogue()
 
         if pyxel.btnp(pyxel.KEY_RETURN):
-            pyxel.play(3,38)
+            sons.jouer(3, 38)
             global pieces_selectionnees
             if self.nb_pieces!=0:
                 if self.nb_pieces==len(self.liste_piece_choisies):
                     pieces_selectionnees = self.liste_pieces_deja_choisies + self.liste_piece_choisies
-                    App(Plateau_de_jeu(Plateau(len(pieces_selectionnees)).clear))
+                    scenes.remplacer(Plateau_de_jeu(Plateau(len(pieces_selectionnees)).clear))
             else :
                 if (self.etape == 0 and len(self.liste_piece_choisies) == 4) or \
                 (self.etape > 0 and len(self.liste_piece_choisies) == 1):
                     pieces_selectionnees = self.liste_pieces_deja_choisies + self.liste_piece_choisies
-                    App(Plateau_de_jeu(Plateau(len(pieces_selectionnees)).clear))
+                    scenes.remplacer(Plateau_de_jeu(Plateau(len(pieces_selectionnees)).clear))
 
     def draw(self):
         pyxel.cls(1)
@@ -307,6 +329,10 @@ class EcranChoixPieces:
         for i in self.liste_pieces_deja_choisies+self.liste_piece_choisies:
             pyxel.rect(i*32,4*32-8,32,32,1)
 
+        for i in self.pieces_impossibles:
+            pyxel.line(i*32+4,4*32-4,i*32+27,4*32+19,6)
+            pyxel.line(i*32+27,4*32-4,i*32+4,4*32+19,6)
+
         pyxel.rectb(self.position_curseur*32,4*32-8,32,32,2)
         pyxel.text(3*32,5*32,"Pieces Selectionnees :",0)
         decalage = 0
@@ -316,16 +342,17 @@ class EcranChoixPieces:
             decalage+=32
 
         pyxel.text(3*32,32*8,"Une fois vos pieces choisies, appuyez sur Entree pour jouer",0)
+        if self.combinaison_impossible:
+            pyxel.text(3*32,32*8+12,"Attention : cette combinaison n'a pas de solution",6)
 
 class Ecran_de_victoire:
 
     def __init__(self):
         self.message = "Victoire!"
-        pyxel.load("ressources.pyxres")
-        pyxel.stop()
-        self.pieces_cascade_liste = []
+        sons.arreter()
         self.val = randint(1, 12) * 16 + 8
         self.piece_size = 32
+        self.pieces_cascade = Particules(limites=(-self.piece_size, -self.piece_size, width, height))
 
     def ajouter_piece_cascade(self):
             corner = random.randint(0, 1)
@@ -333,22 +360,15 @@ class Ecran_de_victoire:
             piece_val = randint(1, 12) * 16 + 8
             if corner == 0:
                 x_position = 0
-                angle_rad = random.uniform(0, math.pi / 2)
+                indice_direction = direction(0, math.pi / 2)
             else:
                 x_position = width - self.piece_size
-                angle_rad = random.uniform(math.pi / 2, math.pi)
+                indice_direction = direction(math.pi / 2, math.pi)
             y_position = height
-            self.pieces_cascade_liste.append([x_position, y_position, piece_val, angle_rad, speed])
+            self.pieces_cascade.emettre_direction(x_position, y_position, indice_direction, speed, piece_val)
 
     def pieces_deplacement(self):
-        for piece in self.pieces_cascade_liste.copy():
-            x, y, _, angle, speed = piece
-            dx = speed * math.cos(angle)
-            dy = -speed * math.sin(angle)
-            piece[0] += dx
-            piece[1] += dy
-            if piece[1] < -self.piece_size:
-                self.pieces_cascade_liste.remove(piece)
+        self.pieces_cascade.deplacer()
 
     def update(self):
         if pyxel.frame_count % 30 == 0:
@@ -358,12 +378,13 @@ class Ecran_de_victoire:
         self.pieces_deplacement()
 
         if pyxel.btn(pyxel.KEY_RETURN):
-            pyxel.play(3,38)
+            sons.jouer(3, 38)
             global mode_grand_chelem,pieces_selectionnees
             if mode_grand_chelem:
-                App(Plateau_de_jeu(Plateau(len(pieces_selectionnees)).clear))
+                scenes.remplacer(Plateau_de_jeu(Plateau(len(pieces_selectionnees)).clear))
             else :
-                App(EcranChoixPieces(0))
+                scenes.remplacer(EcranChoixPieces(0))
+            return
 
         if pyxel.btnp(pyxel.KEY_Q):
             pyxel.quit()
@@ -371,19 +392,17 @@ class Ecran_de_victoire:
     def draw(self):
         pyxel.cls(1)
         pyxel.text(width // 2 - len(self.message)*2, height // 2 - 4, self.message, 0)
-        for piece in self.pieces_cascade_liste:
-            x, y, piece_val, _, _ = piece
-            pyxel.blt(x, y, 0, piece_val, 16, 16, 16, 0, scale=2.0)
+        with profileur.section("cascade"):
+            self.pieces_cascade.dessiner()
 
 class Ecran_de_fin:
 
     def __init__(self):
         global mode_grand_chelem,niveau_grand_chelem
-        pyxel.load("ressources.pyxres")
-        pyxel.stop()
-        self.pieces_cascade_liste = []
+        sons.arreter()
         self.val = randint(1, 12) * 16 + 8
         self.piece_size = 32
+        self.pieces_cascade = Particules(limites=(-self.piece_size, -self.piece_size, width, height))
         self.nom_niveau = "ABCDEFGHIJKL"
         self.message= "Vous avez résolu le dernier niveau de votre partie en mode libre"
 
@@ -391,14 +410,7 @@ class Ecran_de_fin:
             self.message = f"Vous avez résolu le dernier niveau de la série {self.nom_niveau[niveau_grand_chelem]}"
 
     def pieces_deplacement(self):
-        for piece in self.pieces_cascade_liste.copy():
-            x, y, _, angle, speed = piece
-            dx = speed * math.cos(angle)
-            dy = -speed * math.sin(angle)
-            piece[0] += dx
-            piece[1] -= dy
-            if piece[1] < -self.piece_size:
-                self.pieces_cascade_liste.remove(piece)
+        self.pieces_cascade.deplacer()
 
     def ajouter_piece_cascade_chelem(self):
         corner = random.randint(0, 1)
@@ -406,21 +418,22 @@ class Ecran_de_fin:
         piece_val = randint(1, 12) * 16 + 8
         if corner == 0:
             x_position = 0
-            angle_rad = random.uniform(0, math.pi / 2)
+            indice_direction = direction(0, math.pi / 2)
         else:
             x_position = width - self.piece_size
-            angle_rad = random.uniform(math.pi / 2, math.pi)
+            indice_direction = direction(math.pi / 2, math.pi)
         y_position = 0
-        self.pieces_cascade_liste.append([x_position, y_position, piece_val, angle_rad, speed])
+        self.pieces_cascade.emettre_direction(x_position, y_position, indice_direction, speed, piece_val, sens_y=1)
 
     def update(self):
         if pyxel.btnr(pyxel.KEY_RETURN):
-            pyxel.play(3,38)
+            sons.jouer(3, 38)
             global mode_grand_chelem,niveau_grand_chelem,pieces_selectionnees
             mode_grand_chelem = False
             niveau_grand_chelem = 0
             pieces_selectionnees = []
-            App(MainMenu())
+            scenes.remplacer(MainMenu())
+            return
 
         self.ajouter_piece_cascade_chelem()
         self.pieces_deplacement()
@@ -428,71 +441,30 @@ class Ecran_de_fin:
     def draw(self):
         pyxel.cls(1)
 
-        for piece in self.pieces_cascade_liste:
-            x, y, piece_val, _, _ = piece
-            pyxel.blt(x, y, 0, piece_val, 16, 16, 16, 0, scale=2.0)
+        with profileur.section("cascade"):
+            self.pieces_cascade.dessiner()
 
         pyxel.bltm(4*32,90,2,0,16,14*8,16,3,scale=2.0)
         pyxel.text(4*32+26,150,"Felicitations !",0)
         pyxel.text(2*32,170,self.message,0)
         pyxel.text(3*32,200,"Appuyez sur ENTREE pour retourner au Menu Titre",0)
 
-class Plateau:
-
-    def __init__(self,taille: int):
-        self.taille = taille
-        self.clear = self.plateau_clear()
-
-    def plateau_clear(self):
-        plateau = [[0 for _ in range(self.taille)] for _ in range(5)]
-        return plateau
-
-taille = 12
-plateau = Plateau(taille).clear
-
 class Plateau_de_jeu:
-    def __init__(self, plateau, cell_size=32, loaded_from_save=False):
+    def __init__(self, plateau, cell_size=32, loaded_from_save=False, placements=()):
         global pieces_selectionnees, mode_grand_chelem, niveau_grand_chelem, etape
-        if loaded_from_save:
-            self.plateau = plateau
-            self.Dplateau = [row[:] for row in self.plateau]
-            self.etape = etape
-            self.pieces = create_pieces(self.plateau)
-            self.pieces_jouables = [[self.pieces[piece_idx],False,False] for piece_idx in pieces_selectionnees]
-            if not self.pieces_jouables:
-                self.index_piece_selectionnee = -1
-                self.piece_selectionnee = None
-            else:
-                self.index_piece_selectionnee = 0
-                self.piece_selectionnee = self.pieces_jouables[self.index_piece_selectionnee][0]
-            self.index_pieces_non_jouables = [i for i in range(12) if i not in pieces_selectionnees]
-        else:
-            self.Dplateau = [row[:] for row in plateau]
-            self.plateau = plateau
-            self.etape = len(pieces_selectionnees)
-            self.pieces = create_pieces(self.plateau)
-            self.pieces_jouables = [[self.pieces[piece],False,False] for piece in pieces_selectionnees]
-            if not self.pieces_jouables:
-                self.index_piece_selectionnee = -1
-                self.piece_selectionnee = None
-            else:
-                self.index_piece_selectionnee = 0
-                self.piece_selectionnee = self.pieces_jouables[self.index_piece_selectionnee][0]
-            self.index_pieces_non_jouables = [i for i in range(12) if i not in pieces_selectionnees]
+        self.partie = Partie(pieces_selectionnees, plateau, etape if loaded_from_save else None, mode_grand_chelem, niveau_grand_chelem)
+        self.partie.restaurer(placements)
 
-        print(f"Plateau_de_jeu initialized. Etape: {self.etape}, Loaded: {loaded_from_save}")
+        print(f"Plateau_de_jeu initialized. Etape: {self.partie.etape}, Loaded: {loaded_from_save}")
 
         self.cell_size = cell_size
-        self.ligne = len(self.plateau)
-        self.cols = len(self.plateau[0]) if self.ligne > 0 else 0
+        self.ligne = self.partie.ligne
+        self.cols = self.partie.cols
 
-        pyxel.colors.from_list([0x000000, 0xFFFFFF, 0x7F7F7F, 0xC3C3C3, 0x64BCED, 0x200CFF, 0xFF1E27, 0x880015, 0xFFFF00, 0xF58B1A, 0x20BD0F, 0x104F12, 0xF585B1, 0xCA42D1, 0x6325D4, 0x807625])
         self.colors = [4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15]
 
-        pyxel.load("ressources.pyxres")
-
         if musique:
-            pyxel.playm(3,loop=True)
+            sons.jouer_musique(3)
 
         self.liste_des_coordonnees_des_boutons = [(32*3,32*6),(32*4,32*6),(32*5,32*6),(32*6,32*6),(32*7,32*6),(32*8,32*6),(32*3,32*7),(32*4,32*7),(32*5,32*7),(32*6,32*7),(32*7,32*7),(32*8,32*7)]
         
@@ -502,193 +474,398 @@ class Plateau_de_jeu:
         self.alert_timer = 0
         self.alert_duration = 50
 
-        self.save_filename = "../saves/katamino_save.json"
+        self.verificateur = verificateur(self.cols, self.ligne)
+        self.occupation_verifiee = None
+        self.regions = SuiviRegions(self.cols, self.ligne, self.partie.bitplateau.occupe)
+        self.verifier_solvabilite()
+
+        # aide : None, "indice" (montre ou poser une piece) ou "auto" (pose toutes les pieces restantes).
+        # Une partie enregistree ou relue cherche avec un nombre fixe d'essais par image et sa propre
+        # table, que le thread de verification ne remplit pas : l'aide finit toujours a la meme image.
+        self.rejouable = scenes.entrees is not None
+        self.indice = Indice(self.cols, self.ligne, cache=TableTransposition() if self.rejouable else None)
+        self.aide = None
+        self.occupation_aide = None
+        # sauvegardes[emplacement] : numero de la derniere demande dont on attend le resultat
+        self.sauvegardes = {}
+        self.derniere_action = None
+        self.placement_indice = None
+        self.a_poser = None
+        self.attente_auto = 0
+
+        self.position_alerte = (8*32, self.ligne * self.cell_size + 150)
+        # au-dessus de la legende des touches : la derniere ligne est celle des alertes
+        self.position_etat = (270, height - 50)
+        self.position_positions = (10, self.ligne * self.cell_size + 20)
+        self.boutons_par_tuile = {(x // 32, y // 32): num for num, (x, y) in enumerate(self.liste_des_coordonnees_des_boutons)}
+        self.cases_affichees = [[None] * self.cols for _ in range(self.ligne)]
+        self.occupation_affichee = None
+        self.fantome_affiche = {}
+        self.apercu_affiche = 0
+        self.indice_affiche = 0
+        self.boutons_affiches = [None] * 12
+        self.textes_affiches = None
+        self.souris = None
+        self.profileur_affiche = False
+        self.rendu = RenduTuiles(width, height)
+        self.rendu.composer(self.dessiner_fond)
+
+    def reprendre(self):
+        self.rendu.invalider()
+
+    def verifier_solvabilite(self):
+        partie = self.partie
+        if partie.bitplateau.occupe == self.occupation_verifiee:
+            return
+        self.occupation_verifiee = partie.bitplateau.occupe
+
+        position_morte = self.regions.position_morte()
+        self.regions.mettre_a_jour(partie.bitplateau.occupe)
+        if self.regions.position_morte() and not position_morte:
+            self.alerte("Zone impossible a remplir!")
+
+        self.verificateur.demander(partie.bitplateau.cases_vides(), self.pieces_restantes())
+
+    def pieces_restantes(self):
+        pieces_posees = {value for row in self.partie.plateau for value in row}
+        return [piece[0].numero - 1 for piece in self.partie.pieces_jouables if piece[0].numero not in pieces_posees]
+
+    def demander_aide(self, mode):
+        partie = self.partie
+        sons.jouer(3, 38)
+        self.aide = mode
+        self.occupation_aide = partie.bitplateau.occupe
+        self.derniere_action = partie.historique[-1] if partie.historique else None
+        self.placement_indice = None
+        self.a_poser = None
+        self.indice.demander(partie.bitplateau.cases_vides(), self.pieces_restantes())
+
+    def arreter_aide(self):
+        self.aide = None
+        self.placement_indice = None
+        self.a_poser = None
+        self.indice.annuler()
+
+    def suivre_aide(self):
+        if self.aide is None:
+            return
+        partie = self.partie
+        # le joueur a pose ou retire une piece (ou, en completion automatique, fait quoi que
+        # ce soit) : la recherche en cours ne correspond plus au plateau
+        derniere_action = partie.historique[-1] if partie.historique else None
+        if partie.bitplateau.occupe != self.occupation_aide or (self.aide == "auto" and derniere_action is not self.derniere_action):
+            self.arreter_aide()
+            return
+
+        self.indice.avancer(ESSAIS_PAR_IMAGE if self.rejouable else None)
+        if not self.indice.termine:
+            return
+        solution = self.indice.resultat
+        if solution is None:
+            sons.jouer(3, 34)
+            self.alerte("Aucune solution depuis ce plateau!")
+            self.arreter_aide()
+            return
+
+        if self.aide == "indice":
+            if self.placement_indice is None:
+                # de preference la piece selectionnee, si elle fait partie de la solution
+                selection = partie.piece_selectionnee
+                self.placement_indice = next((placement for placement in solution if selection is not None and placement.piece == selection.index), solution[0])
+            return
+
+        if self.a_poser is None:
+            self.a_poser = list(solution)
+        if self.attente_auto > 0:
+            self.attente_auto -= 1
+            return
+        placement = self.a_poser.pop(0)
+        if not partie.poser(placement.piece, placement.orientation, placement.x, placement.y):
+            self.arreter_aide()
+            return
+        sons.jouer(3, 36)
+        sons.jouer(3, 37)
+        self.attente_auto = DELAI_AUTO
+        self.occupation_aide = partie.bitplateau.occupe
+        self.derniere_action = partie.historique[-1] if partie.historique else None
+        if not self.a_poser:
+            self.arreter_aide()
+
+    def sauvegarder(self, emplacement):
+        self.sauvegardes[emplacement] = sauvegardeur().demander(emplacement, {
+            "mode_grand_chelem": mode_grand_chelem,
+            "niveau_grand_chelem": niveau_grand_chelem,
+            "pieces_selectionnees": list(pieces_selectionnees),
+            "placements": self.partie.placements(),
+            "colonnes": self.cols,
+            "lignes": self.ligne,
+            "etape": self.partie.etape,
+        })
+
+    def sauvegarde_automatique(self):
+        if sauvegarde_auto:
+            self.sauvegarder(EMPLACEMENT_AUTO)
+
+    def suivre_sauvegardes(self):
+        # la confirmation n'est affichee qu'une fois le fichier reellement ecrit
+        for emplacement, numero in list(self.sauvegardes.items()):
+            ecrite = sauvegardeur().resultat(emplacement, numero)
+            if ecrite is None:
+                continue
+            del self.sauvegardes[emplacement]
+            if not ecrite:
+                sons.jouer(3, 34)
+                self.alerte("Echec de la sauvegarde!")
+            elif emplacement != EMPLACEMENT_AUTO:
+                self.alerte("Partie sauvegardée!")
+
+    def alerte(self, message):
+        self.alert_message = message
+        self.alert_timer = self.alert_duration
+
+    def modification(self, success, message, son):
+        if not success:
+            sons.jouer(3, 34)
+            self.alerte(message)
+        else :
+            sons.jouer(3, son)
 
-    def verif_victoire(self):
-        for y in range(self.ligne):
-            for x in range(self.cols):
-                if self.plateau[y][x] == 0:
-                    return False
-        return True
     def update(self):
         pyxel.mouse(True)
         global mode_grand_chelem, niveau_grand_chelem, pieces_selectionnees, etape, grand_chelem,musique
+        partie = self.partie
         
         if pyxel.btnr(pyxel.KEY_SPACE):
-            pyxel.play(3,38)
+            sons.jouer(3, 38)
             self.menu_rapide = not self.menu_rapide
 
         if self.menu_rapide :
 
             if pyxel.btnp(pyxel.KEY_M):
-                pyxel.play(3,38)
-                save_game_file(mode_grand_chelem, niveau_grand_chelem, pieces_selectionnees, self.plateau, self.etape, self.save_filename)
-                self.alert_message = "Partie sauvegardée!"
-                self.alert_timer = self.alert_duration
-                for piece in self.pieces_jouables:
-                    piece[1] = False
-                    piece[2] = False
-                    piece[0].retirer()
-                    piece[0].cos_de_départ()
-                    pieces_selectionnees = []
-                App(MainMenu())
+                sons.jouer(3, 38)
+                self.sauvegarder(EMPLACEMENT_MANUEL)
+                # on ne quitte la partie que si elle est bien sur le disque
+                sauvegardeur().attendre()
+                if not sauvegardeur().resultat(EMPLACEMENT_MANUEL, self.sauvegardes.pop(EMPLACEMENT_MANUEL)):
+                    sons.jouer(3, 34)
+                    self.alerte("Echec de la sauvegarde!")
+                    self.menu_rapide = False
+                    return
+                partie.effacer()
+                pieces_selectionnees = []
+                scenes.remplacer(MainMenu())
+                return
 
             if pyxel.btnp(pyxel.KEY_S):
-                save_game_file(mode_grand_chelem, niveau_grand_chelem, pieces_selectionnees, self.plateau, self.etape, self.save_filename)
-                self.alert_message = "Partie sauvegardée!"
-                self.alert_timer = self.alert_duration
+                self.sauvegarder(EMPLACEMENT_MANUEL)
 
             if pyxel.btnp(pyxel.KEY_X):
                 if musique :
-                    pyxel.stop()
+                    sons.arreter()
                 else :
-                    pyxel.playm(3,loop=True)
+                    sons.jouer_musique(3)
                 musique = not musique
 
-        if pyxel.btn(pyxel.KEY_C):
-                for piece in self.pieces_jouables :
-                    piece[1] = False
-                    piece[2] = False
-                    piece[0].retirer()
-                    piece[0].cos_de_départ()
-                    pyxel.play(3,32)
+        if pyxel.btnp(pyxel.KEY_C):
+                partie.effacer()
+                sons.jouer(3, 32)
 
         if pyxel.btnp(pyxel.KEY_A):
-                self.piece_selectionnee.retirer()
-                self.pieces_jouables[self.index_piece_selectionnee][1] = False
-                self.pieces_jouables[self.index_piece_selectionnee][2] = False
-                pyxel.play(3,32)
+                partie.retirer()
+                sons.jouer(3, 32)
 
         if pyxel.btnp(pyxel.KEY_P,repeat=10):
-                self.plateau, success = self.piece_selectionnee.place_on_plateau()
-                if not success :
-                    pyxel.play(3,34)
-                    self.alert_message = "Placement impossible!"
-                    self.alert_timer = self.alert_duration
+                if not partie.placer() :
+                    sons.jouer(3, 34)
+                    self.alerte("Placement impossible!")
                 else :  
-                    self.pieces_jouables[self.index_piece_selectionnee][1] = True
-                    self.pieces_jouables[self.index_piece_selectionnee][2] = True
-                    pyxel.play(3,36)
-                    pyxel.play(3,37)
+                    sons.jouer(3, 36)
+                    sons.jouer(3, 37)
+                    self.sauvegarde_automatique()
 
         if pyxel.btnp(pyxel.KEY_R,repeat=10):
-                self.Dplateau, success = self.piece_selectionnee.rotate()
-                if not success:
-                    pyxel.play(3,34)
-                    self.alert_message = "Rotation impossible!"
-                    self.alert_timer = self.alert_duration
-                else :
-                    self.pieces_jouables[self.index_piece_selectionnee][2] = True
-                    pyxel.play(3,35)
+                self.modification(partie.tourner(), "Rotation impossible!", 35)
 
         if pyxel.btnp(pyxel.KEY_E,repeat=8):
-            self.Dplateau, success = self.piece_selectionnee.symetrie()
-            if not success:
-                pyxel.play(3,34)
-                self.alert_message = "Symetrie impossible!"
-                self.alert_timer = self.alert_duration
-            else :
-                    self.pieces_jouables[self.index_piece_selectionnee][2] = True
-                    pyxel.play(3,35)
+            self.modification(partie.retourner(), "Symetrie impossible!", 35)
 
         if pyxel.btnp(pyxel.KEY_LEFT,repeat=8) or pyxel.btnp(pyxel.KEY_Q,repeat=8):
-            self.Dplateau, success = self.piece_selectionnee.deplacement(-1, 0)
-            if not success:
-                pyxel.play(3,34)
-                self.alert_message = "Deplacement impossible!"
-                self.alert_timer = self.alert_duration
-            else :
-                self.pieces_jouables[self.index_piece_selectionnee][2] = True
-                pyxel.play(3,33)
+            self.modification(partie.deplacer(-1, 0), "Deplacement impossible!", 33)
 
         if pyxel.btnp(pyxel.KEY_RIGHT,repeat=8) or pyxel.btnp(pyxel.KEY_D,repeat=8):
-            self.Dplateau, success = self.piece_selectionnee.deplacement(1, 0)
-            if not success:
-                pyxel.play(3,34)
-                self.alert_message = "Deplacement impossible!"
-                self.alert_timer = self.alert_duration
-            else :
-                self.pieces_jouables[self.index_piece_selectionnee][2] = True
-                pyxel.play(3,33)
+            self.modification(partie.deplacer(1, 0), "Deplacement impossible!", 33)
 
         if pyxel.btnp(pyxel.KEY_DOWN,repeat=8) or pyxel.btnp(pyxel.KEY_S,repeat=8):
-            self.Dplateau, success = self.piece_selectionnee.deplacement(0, 1)
-            if not success:
-                pyxel.play(3,34)
-                self.alert_message = "Deplacement impossible!"
-                self.alert_timer = self.alert_duration
-            else :
-                self.pieces_jouables[self.index_piece_selectionnee][2] = True
-                pyxel.play(3,33)
+            self.modification(partie.deplacer(0, 1), "Deplacement impossible!", 33)
 
         if pyxel.btnp(pyxel.KEY_UP,repeat=8) or pyxel.btnp(pyxel.KEY_Z,repeat=8):
-            self.Dplateau, success = self.piece_selectionnee.deplacement(0, -1)
-            if not success:
-                pyxel.play(3,34)
-                self.alert_message = "Deplacement impossible!"
-                self.alert_timer = self.alert_duration
-            else :
-                self.pieces_jouables[self.index_piece_selectionnee][2] = True     
-                pyxel.play(3,33)
+            self.modification(partie.deplacer(0, -1), "Deplacement impossible!", 33)
 
         if pyxel.btnp(pyxel.KEY_N):
-            if self.piece_selectionnee.etat_deplacement:
-                if self.piece_selectionnee.test_placement():
-                    if self.pieces_jouables[self.index_piece_selectionnee][2]:
-                        self.piece_selectionnee.place_on_plateau()
-                        self.pieces_jouables[self.index_piece_selectionnee][1] = True  
+            resultat = partie.piece_suivante()
+            if resultat == "posee":
+                sons.jouer(3, 36)
+                sons.jouer(3, 37)
+                self.sauvegarde_automatique()
+            elif resultat == "deplacee":
+                sons.jouer(3, 33)
+            elif resultat == "retiree":
+                sons.jouer(3, 32)
 
-                    self.index_piece_selectionnee = (self.index_piece_selectionnee + 1) % len(self.pieces_jouables)
-                    self.piece_selectionnee = self.pieces_jouables[self.index_piece_selectionnee][0]
+        if pyxel.btnp(pyxel.KEY_U,repeat=8):
+            self.modification(partie.annuler(), "Rien a annuler!", 33)
 
-                    pyxel.play(3,36)
-                    pyxel.play(3,37)
-
-                    if self.pieces_jouables[self.index_piece_selectionnee][1]:
-                        self.piece_selectionnee.etat_deplacement = False
-                    else:
-                        self.piece_selectionnee.etat_deplacement = True
-                else:
-                    self.piece_selectionnee.retirer()
-                    pyxel.play(3,32)
+        if pyxel.btnp(pyxel.KEY_Y,repeat=8):
+            self.modification(partie.refaire(), "Rien a refaire!", 33)
 
-                    self.pieces_jouables[self.index_piece_selectionnee][1] = False  
-                    self.index_piece_selectionnee = (self.index_piece_selectionnee + 1) % len(self.pieces_jouables)
-                    self.piece_selectionnee = self.pieces_jouables[self.index_piece_selectionnee][0]
+        if pyxel.btnp(pyxel.KEY_H):
+            self.demander_aide("indice")
 
-                    if self.pieces_jouables[self.index_piece_selectionnee][1]:
-                        self.piece_selectionnee.etat_deplacement = False
-                    else:
-                        self.piece_selectionnee.etat_deplacement = True
-            else:
-                self.index_piece_selectionnee = (self.index_piece_selectionnee + 1) % len(self.pieces_jouables)
-                self.piece_selectionnee = self.pieces_jouables[self.index_piece_selectionnee][0]
+        if pyxel.btnp(pyxel.KEY_T):
+            self.demander_aide("auto")
 
-                if self.pieces_jouables[self.index_piece_selectionnee][1]:
-                    self.piece_selectionnee.etat_deplacement = False
-                else:
-                    self.piece_selectionnee.etat_deplacement = True
+        self.suivre_aide()
 
-        if self.verif_victoire():
-            pyxel.play(3,26)
-            pyxel.play(3,27)
+        if partie.verif_victoire():
+            sons.jouer(3, 26)
+            sons.jouer(3, 27)
 
-            self.alert_message = "Victoire!"
-            self.alert_timer = self.alert_duration
+            self.alerte("Victoire!")
 
-            if self.etape == 12 :
-                App(Ecran_de_fin())
+            if partie.derniere_etape() :
+                scenes.remplacer(Ecran_de_fin())
+                return
 
             if mode_grand_chelem :
-                pieces_selectionnees = [grand_chelem[niveau_grand_chelem][i]-1 for i in range(len(pieces_selectionnees)+1)]
-            App(Ecran_de_victoire())
+                pieces_selectionnees = partie.pieces_etape_suivante()
+            scenes.remplacer(Ecran_de_victoire())
+            return
+
+        self.verifier_solvabilite()
+        self.suivre_sauvegardes()
 
         if self.alert_timer > 0:
             self.alert_timer -= 1
 
-    def draw(self): 
-        pyxel.cls(1)
+    def dessiner_fond(self, cible):
+        # tout ce qui ne change pas pendant la partie
+        cible.cls(1)
+        cible.bltm(3*32,40,0,0,16*8,24*8,10*8,scale=2.0)
+        cible.bltm(3*32+(self.partie.etape-1)*32,40,1,0,0,16*8,10*8,scale=2.0)
 
+        for y in range(self.ligne):
+            for x in range(self.cols):
+                cible.rectb(x * self.cell_size,y * self.cell_size,self.cell_size,self.cell_size,0)
+                cible.rectb((x * self.cell_size)+1,(y * self.cell_size)+1,self.cell_size-2,self.cell_size-2,0)
+
+        cible.text(10, self.ligne * self.cell_size + 10, "Piece selectionnee :", 0)
+        if self.partie.piece_selectionnee is not None:
+            cible.bltm(32*3, self.ligne * self.cell_size+32, 0, 0, 0,  24*8, 8*8, 0,scale=2.0)
+
+        for i in self.partie.index_pieces_non_jouables :
+                cible.rect(self.liste_des_coordonnees_des_boutons[i][0],self.liste_des_coordonnees_des_boutons[i][1],32,32,1)
+
+        cmd_color = 0
+        hauteur_txt = 10
+        nbr_col = 3
+
+        Y_normal = height - (nbr_col * hauteur_txt)
+
+        x_left = 20
+        cible.text(x_left, Y_normal, "P: Placer Piece", cmd_color)
+        cible.text(x_left, Y_normal + hauteur_txt, "R: Rotation", cmd_color)
+        cible.text(x_left, Y_normal + 2 * hauteur_txt, "E: Symetrie", cmd_color)
+        x_mid = 145 
+        cible.text(x_mid, Y_normal, "A: Retirer Piece", cmd_color)
+        cible.text(x_mid, Y_normal + hauteur_txt, "C: Effacer le plateau", cmd_color)
+        cible.text(x_mid, Y_normal + 2 * hauteur_txt, "N: Piece Suivante", cmd_color)
+        x_right = 270
+        cible.text(x_right, Y_normal - hauteur_txt, "H/T: Indice/Terminer", cmd_color)
+        cible.text(x_right, Y_normal, "U/Y: Annuler/Refaire", cmd_color)
+        cible.text(x_right, Y_normal + hauteur_txt, "ESPACE: Menu rapide", cmd_color)
+
+    def etat_bouton(self, num):
+        piece = self.partie.piece_selectionnee
+        selectionne = piece is not None and piece.numero - 1 == num
+        return selectionne, any(p[1] and p[0].numero - 1 == num for p in self.partie.pieces_jouables)
+
+    def texte_alerte(self):
+        return self.alert_message if self.alert_timer > 0 else ""
+
+    def texte_positions(self):
+        if self.partie.piece_selectionnee is None:
+            return ""
+        nombre, _ = self.partie.positions_legales()
+        return f"{nombre} position{'s' if nombre > 1 else ''} libre{'s' if nombre > 1 else ''}"
+
+    def texte_etat(self):
+        if self.aide is not None and not self.indice.termine:
+            return f"Recherche... {int(self.indice.avancement() * 100)}%", 0
+        if self.verificateur.en_cours:
+            return "Analyse...", 0
+        if self.verificateur.resultat is None:
+            return "Solvabilite inconnue", 0
+        elif self.verificateur.resultat:
+            return "Solution possible", 0
+        return "Plus de solution", 6
+
+    def marquer_cases(self, masque):
+        while masque:
+            bit = masque & -masque
+            case = bit.bit_length() - 1
+            self.rendu.marquer_zone((case % self.cols) * self.cell_size, (case // self.cols) * self.cell_size, self.cell_size, self.cell_size)
+            masque ^= bit
+
+    def marquer_changements(self):
+        rendu = self.rendu
+        partie = self.partie
+        # le plateau ne change qu'avec l'occupation, le fantome est compare case par case
+        if partie.bitplateau.occupe != self.occupation_affichee:
+            self.occupation_affichee = partie.bitplateau.occupe
+            for y in range(self.ligne):
+                cases = self.cases_affichees[y]
+                for x in range(self.cols):
+                    if cases[x] != partie.plateau[y][x]:
+                        cases[x] = partie.plateau[y][x]
+                        rendu.marquer_zone(x * self.cell_size, y * self.cell_size, self.cell_size, self.cell_size)
+
+        fantome = partie.fantome.cases
+        if fantome != self.fantome_affiche:
+            for case in fantome.keys() | self.fantome_affiche.keys():
+                if fantome.get(case) != self.fantome_affiche.get(case):
+                    rendu.marquer_zone(case[1] * self.cell_size, case[0] * self.cell_size, self.cell_size, self.cell_size)
+            self.fantome_affiche = dict(fantome)
+
+        # apercu des positions libres et indice : seules les cases qui entrent ou sortent changent
+        _, apercu = partie.positions_legales()
+        self.marquer_cases(apercu ^ self.apercu_affiche)
+        self.apercu_affiche = apercu
+        indice = self.placement_indice.masque if self.placement_indice is not None else 0
+        self.marquer_cases(indice ^ self.indice_affiche)
+        self.indice_affiche = indice
+
+        for num, (x, y) in enumerate(self.liste_des_coordonnees_des_boutons):
+            etat = self.etat_bouton(num)
+            if self.boutons_affiches[num] != etat:
+                self.boutons_affiches[num] = etat
+                rendu.marquer_zone(x, y, 32, 32)
+
+        textes = (self.texte_alerte(), self.texte_etat(), self.texte_positions())
+        if textes != self.textes_affiches:
+            self.textes_affiches = textes
+            rendu.marquer_zone(self.position_positions[0], self.position_positions[1], 80, 6)
+            rendu.marquer_zone(self.position_alerte[0], self.position_alerte[1], width, 6)
+            rendu.marquer_zone(self.position_etat[0], self.position_etat[1], width, 6)
+
+        # le curseur de la souris et le profileur sont dessines par-dessus l'image precedente
+        if self.souris is not None:
+            rendu.marquer_zone(self.souris[0], self.souris[1], 8, 8)
+        self.souris = (pyxel.mouse_x, pyxel.mouse_y)
+        if (profileur.actif or self.profileur_affiche) and profileur.zone is not None:
+            rendu.marquer_zone(*profileur.zone)
+        self.profileur_affiche = profileur.actif
+
+    def draw(self): 
         if self.menu_rapide :
             pyxel.cls(3)
             pyxel.bltm(4*32,3*32,0,0,48*8,16*8,16*8,scale=2.0)
@@ -696,237 +873,82 @@ class Plateau_de_jeu:
             pyxel.text(4*32+16,5*32,"S : SAUVEGARDER",0)
             pyxel.text(4*32+16,6*32,"X: ACTIVER/DESACTIVER LA MUSIQUE",0)
             pyxel.text(4*32+16,7*32,"ESPACE: RETOUR",0)
-        else :
-            pyxel.bltm(3*32,40,0,0,16*8,24*8,10*8,scale=2.0)
-            pyxel.bltm(3*32+(self.etape-1)*32,40,1,0,0,16*8,10*8,scale=2.0)
-
-            for y in range(self.ligne):
-                for x in range(self.cols):
-                    value = self.plateau[y][x]
-                    if value > 0:
-                        color = self.colors[(value % len(self.colors))-1]
-                        pyxel.rect(x * self.cell_size,y * self.cell_size,self.cell_size,self.cell_size,color)
-                    pyxel.rectb(x * self.cell_size,y * self.cell_size,self.cell_size,self.cell_size,0)
-                    pyxel.rectb((x * self.cell_size)+1,(y * self.cell_size)+1,self.cell_size-2,self.cell_size-2,0)
-
-            for y in range(self.ligne):
-                for x in range(self.cols):
-                    value = self.Dplateau[y][x]
-                    if value > 0:
-                        color = self.colors[(value % len(self.colors))-1]
-                        pyxel.rect((x * self.cell_size)+4,(y * self.cell_size)+4,self.cell_size-8,self.cell_size-8,color)
-
-            pyxel.text(10, self.ligne * self.cell_size + 10, "Piece selectionnee :", 0)
-
-            if self.piece_selectionnee is not None:
-                rect_cos = self.liste_des_coordonnees_des_boutons[self.piece_selectionnee.numero - 1]
-                pyxel.bltm(32*3, self.ligne * self.cell_size+32, 0, 0, 0,  24*8, 8*8, 0,scale=2.0)
-                pyxel.rectb(rect_cos[0],rect_cos[1],32,32,2)
-
-            for i in self.index_pieces_non_jouables :
-                    pyxel.rect(self.liste_des_coordonnees_des_boutons[i][0],self.liste_des_coordonnees_des_boutons[i][1],32,32,1)
-
-            for piece in self.pieces_jouables :
-                if piece[1]:
-                    num = piece[0].numero - 1
-                    pyxel.bltm(self.liste_des_coordonnees_des_boutons[num][0]+8,self.liste_des_coordonnees_des_boutons[num][1]+8,0,num*16,10*8,16,16,4,scale=2.0)
-
-            if self.alert_timer > 0:
-                message_x = 8*32
-                message_y = self.ligne * self.cell_size + 150
-                pyxel.text(message_x, message_y, self.alert_message, 6)
-            cmd_color = 0
-
-            hauteur_txt = 10
-            nbr_col = 3
-            
-            Y_normal = pyxel.height - (nbr_col * hauteur_txt)
-
-            x_left = 20
-            pyxel.text(x_left, Y_normal, "P: Placer Piece", cmd_color)
-            pyxel.text(x_left, Y_normal + hauteur_txt, "R: Rotation", cmd_color)
-            pyxel.text(x_left, Y_normal + 2 * hauteur_txt, "E: Symetrie", cmd_color)
-            x_mid = 145 
-            pyxel.text(x_mid, Y_normal, "A: Retirer Piece", cmd_color)
-            pyxel.text(x_mid, Y_normal + hauteur_txt, "C: Effacer le plateau", cmd_color)
-            pyxel.text(x_mid, Y_normal + 2 * hauteur_txt, "N: Piece Suivante", cmd_color)
-            x_right = 270
-            pyxel.text(x_right, Y_normal + hauteur_txt, "ESPACE: Menu rapide", cmd_color)
-            
-
-class Piece:
-    def __init__(self, numero, patron, plateau):
-        self.numero = numero
-        self.patron = patron
-
-        self.plateau = plateau
-        self.Dplateau = [row[:] for row in plateau]
-
-        self.etat_deplacement = False
-        self.cos_actuelles = self.cos_de_départ()
-
-    def cos_de_départ(self):
-        coordinates = []
-        for i, row in enumerate(self.patron):
-            for j, val in enumerate(row):
-                if val != 0:
-                    coordinates.append([i, j])
-        return coordinates
-    
-    def place_on_Dplateau(self):
-        for i in range(len(self.Dplateau)):
-            for j in range(len(self.Dplateau[0])):
-                self.Dplateau[i][j] = 0
-
-        if self.etat_deplacement:
-            for x, y in self.cos_actuelles:
-                self.Dplateau[x][y] = self.numero
-
-        if not self.etat_deplacement:
-            for x, y in self.cos_actuelles:
-                self.plateau[x][y] = 0
-                self.Dplateau[x][y] = self.numero
-                self.etat_deplacement = True
-
-        return self.Dplateau
-    
-    def test_placement(self):
-        if all( self.plateau[x][y] == 0  for x, y in self.cos_actuelles):
-            return True
-        else:
-            return False
-        
-    def place_on_plateau(self):
-        if not self.test_placement():
-            return self.plateau, False
-        
-        if self.etat_deplacement:
-            for x, y in self.cos_actuelles:
-                self.Dplateau[x][y] = 0
-                self.plateau[x][y] = self.numero
-            self.etat_deplacement = False
-            return self.plateau, True
-        else:
-            for x, y in self.cos_actuelles:
-                self.plateau[x][y] = self.numero
-            self.etat_deplacement = False
-            return self.plateau, True
-        
-    def retirer(self):
-        if self.etat_deplacement:
-            for x,y in self.cos_actuelles :
-                self.Dplateau[x][y] = 0
-        else :
-            for x,y in self.cos_actuelles :
-                self.plateau[x][y] = 0
-        self.etat_deplacement = True
-
-    def deplacement(self, dy, dx):
-        self.place_on_Dplateau()
-
-        old_coordinates = self.cos_actuelles.copy()
-        new_coordinates = []
-
-        for x, y in self.cos_actuelles:
-            new_x, new_y = x + dx, y + dy
-            new_coordinates.append([new_x, new_y])
-
-        if all(0 <= new_x < len(self.plateau) and 0 <= new_y < len(self.plateau[0]) for new_x, new_y in new_coordinates):
-            self.cos_actuelles = new_coordinates
-            return self.place_on_Dplateau(), True
-        
-        self.cos_actuelles = old_coordinates
-        return self.place_on_Dplateau(), False
-    
-    def rotate(self):
-        self.place_on_Dplateau()
-        if self.numero in [6,8,4,5,10]:
-            self.rotation_anchor = self.cos_actuelles[1]
-        if self.numero in [1, 2, 3, 7, 9, 11, 12]:
-            self.rotation_anchor = self.cos_actuelles[2]
-        anchor_x = self.rotation_anchor[0]
-        anchor_y = self.rotation_anchor[1]
-        translated_coordinates = [[x - anchor_x, y - anchor_y] for x, y in self.cos_actuelles]
-        rotated_coordinates = [[y, -x] for x, y in translated_coordinates]
-        final_coordinates = [[x + anchor_x, y + anchor_y] for x, y in rotated_coordinates]
-
-        if all(0 <= x < len(self.plateau) and 0 <= y < len(self.plateau[0]) for x, y in final_coordinates):
-            self.cos_actuelles = final_coordinates
-            return self.place_on_Dplateau(), True
-        else:
-            return self.place_on_Dplateau(), False
-        
-    def symetrie(self):
-        self.place_on_Dplateau()
-        old_coordinates = self.cos_actuelles.copy()
-
-        max_y = max(y for x, y in self.cos_actuelles)
-        symetrie_coordinates = [[x, max_y - y] for x, y in self.cos_actuelles]
-
-        min_y = min(y for x, y in self.cos_actuelles)
-        decalage = min_y - min(y for x, y in symetrie_coordinates)
-
-        symetrie_coordinates = [[x, y + decalage] for x, y in symetrie_coordinates]
-
-        if all(0 <= x < len(self.plateau) and 0 <= y < len(self.plateau[0]) for x, y in symetrie_coordinates):
-            self.cos_actuelles = symetrie_coordinates
-            return self.place_on_Dplateau(), True
-        
-        self.cos_actuelles = old_coordinates
-        return self.place_on_Dplateau(), False
-
-def create_pieces(plateau):
-    pieces = [
-        Piece(1, [ [1],
-                                 [1], 
-                                 [1], 
-                                 [1], 
-                                 [1]], plateau),
-        Piece(2, [[2, 2],
-                                [2], 
-                                [2], 
-                                [2]], plateau),
-        Piece(3, [[3], 
-                                [3, 3], 
-                                [3], 
-                                [3]], plateau),
-
-        Piece(4,[ [4],
-                                [4, 4], 
-                                [0, 4], 
-                                [0, 4]], plateau),
-
-        Piece(5, [[5], 
-                                [5], 
-                                [5, 5, 5]], plateau),
-
-        Piece(6, [[6],
-                                [6, 6], 
-                                [6, 6]], plateau),
-
-        Piece(7,[ [7, 7],
-                                [0, 7], 
-                                [7, 7]], plateau),
-
-        Piece(8,[ [8, 8],
-                                [0, 8], 
-                                [0, 8, 8]], plateau),
-
-        Piece(9, [[9],
-                                [9, 9, 9], 
-                                [0, 9]], plateau),
-        Piece(10, [[10, 10, 10],
-                                 [0, 10], 
-                                 [0, 10]], plateau),
-
-        Piece(11, [[11], 
-                                 [11, 11], 
-                                 [0, 11, 11]], plateau),
-
-        Piece(12, [[0, 12],
-                                 [12, 12, 12], 
-                                 [0, 12]], plateau)
-    ]
-    return pieces
- 
-App(MainMenu())
\ No newline at end of file
+            self.rendu.invalider()
+            return
+
+        with profileur.section("fond"):
+            self.marquer_changements()
+            tuiles = self.rendu.tuiles_a_redessiner()
+
+        cases = [(x, y) for x, y in tuiles if x < self.cols and y < self.ligne]
+        with profileur.section("cases"):
+            for x, y in cases:
+                value = self.partie.plateau[y][x]
+                if value > 0:
+                    color = self.colors[(value % len(self.colors))-1]
+                    pyxel.rect(x * self.cell_size,y * self.cell_size,self.cell_size,self.cell_size,color)
+                pyxel.rectb(x * self.cell_size,y * self.cell_size,self.cell_size,self.cell_size,0)
+                pyxel.rectb((x * self.cell_size)+1,(y * self.cell_size)+1,self.cell_size-2,self.cell_size-2,0)
+
+        with profileur.section("apercu"):
+            apercu = self.apercu_affiche
+            for x, y in cases:
+                if apercu >> (y * self.cols + x) & 1 and self.partie.plateau[y][x] == 0:
+                    pyxel.rect((x * self.cell_size)+14,(y * self.cell_size)+14,4,4,5)
+
+        with profileur.section("indice"):
+            if self.indice_affiche:
+                color = self.colors[self.placement_indice.piece % len(self.colors)]
+                for x, y in cases:
+                    if self.indice_affiche >> (y * self.cols + x) & 1:
+                        pyxel.rectb((x * self.cell_size)+3,(y * self.cell_size)+3,self.cell_size-6,self.cell_size-6,color)
+                        pyxel.rectb((x * self.cell_size)+4,(y * self.cell_size)+4,self.cell_size-8,self.cell_size-8,color)
+
+        with profileur.section("fantome"):
+            a_redessiner = set(cases)
+            for (y, x), value in self.partie.fantome.cases.items():
+                if (x, y) in a_redessiner:
+                    color = self.colors[(value % len(self.colors))-1]
+                    pyxel.rect((x * self.cell_size)+4,(y * self.cell_size)+4,self.cell_size-8,self.cell_size-8,color)
+
+        with profileur.section("palette"):
+            for tuile in tuiles:
+                num = self.boutons_par_tuile.get(tuile)
+                if num is None:
+                    continue
+                selectionne, posee = self.boutons_affiches[num]
+                x, y = self.liste_des_coordonnees_des_boutons[num]
+                if selectionne:
+                    pyxel.rectb(x,y,32,32,2)
+                if posee:
+                    pyxel.bltm(x+8,y+8,0,num*16,10*8,16,16,4,scale=2.0)
+
+        lignes_textes = {self.position_alerte[1] // 32, self.position_etat[1] // 32, self.position_positions[1] // 32}
+        if any(y in lignes_textes for _, y in tuiles):
+            alerte, (etat, couleur_etat), positions = self.textes_affiches
+            with profileur.section("alertes"):
+                if alerte:
+                    pyxel.text(self.position_alerte[0], self.position_alerte[1], alerte, 6)
+                pyxel.text(self.position_positions[0], self.position_positions[1], positions, 0)
+            with profileur.section("legende"):
+                pyxel.text(self.position_etat[0], self.position_etat[1], etat, couleur_etat)
+
+if __name__ == "__main__":
+    if "--verification" in sys.argv:
+        coeur.mode_verification = True
+    pyxel.init(width,height,title="PYTHOMINOES",display_scale=2,fps=30)
+    # --enregistrer fichier : garde les touches de la partie ; --rejouer fichier : les relit en temps reel
+    if "--enregistrer" in sys.argv:
+        enregistreur = Enregistreur(sys.argv[sys.argv.index("--enregistrer") + 1])
+        atexit.register(enregistreur.fermer)
+        random.seed(enregistreur.graine)
+        scenes.entrees = enregistreur
+    elif "--rejouer" in sys.argv:
+        lecteur = Lecteur(sys.argv[sys.argv.index("--rejouer") + 1])
+        # la partie relue charge les sauvegardes du moment de l'enregistrement
+        dossier_rejeu = tempfile.mkdtemp()
+        lecteur.restaurer_sauvegardes(dossier_rejeu)
+        changer_dossier(dossier_rejeu)
+        random.seed(lecteur.graine)
+        scenes.entrees = lecteur
+    scenes.lancer(MainMenu)
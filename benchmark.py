@@ -0,0 +1,276 @@
+import os
+import sys
+import gc
+import json
+import time
+import platform
+import contextlib
+from coeur import Plateau, Partie, create_pieces
+from bitboard import Bitplateau
+from pyxel_factice import installer_pyxel_factice
+
+FICHIER_REFERENCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_reference.json")
+LARGEUR_MIN = 3
+LARGEUR_MAX = 12
+REPETITIONS = 1000
+IMAGES = 200
+# Les appels sont chronometres par lots de LOT au moins : une operation de moins d'une
+# microseconde est plus courte que le cout et la resolution de perf_counter_ns. Les operations
+# les plus courtes ont des lots plus grands, pour que chacun dure au moins DUREE_LOT ns, et
+# au moins LOTS_PAR_TOUR lots par tour.
+LOT = 50
+DUREE_LOT = 200_000
+LOTS_PAR_TOUR = 20
+# chaque mesure est repetee TOURS fois et le debit retenu est le median des tours
+TOURS = 9
+# une mesure est une regression si son debit median tombe sous (1 - SEUIL) fois la reference,
+# et de nouveau quand elle est remesuree seule ; la comparaison n'a de sens que sur la
+# machine et la version de python de la reference
+SEUIL = 0.3
+
+# Touches rejouees en boucle pendant la mesure des images : deplacements, rotations et
+# symetries seulement, pour que l'occupation du plateau (et donc l'analyse de solvabilite
+# en arriere-plan) ne change pas pendant la mesure.
+SEQUENCE_TOUCHES = ["KEY_RIGHT", "KEY_DOWN", "KEY_R", "KEY_LEFT", "KEY_E", "KEY_UP", None]
+
+
+def percentile(valeurs_triees, p):
+    if not valeurs_triees:
+        return 0.0
+    indice = min(len(valeurs_triees) - 1, int(round(p / 100 * (len(valeurs_triees) - 1))))
+    return valeurs_triees[indice]
+
+def chronometrer(operation, debut, fin, preparation=None):
+    # duree en ns des appels debut..fin-1 ; `preparation` est appelee avant chaque appel puis
+    # son cout, mesure sur un lot a part, est retire du total
+    compteur = time.perf_counter_ns
+    if preparation is None:
+        depart = compteur()
+        for numero in range(debut, fin):
+            operation(numero)
+        return compteur() - depart
+    depart = compteur()
+    for numero in range(debut, fin):
+        preparation(numero)
+        operation(numero)
+    total = compteur() - depart
+    depart = compteur()
+    for numero in range(debut, fin):
+        preparation(numero)
+    return max(1, total - (compteur() - depart))
+
+
+class Mesure:
+    # Une operation mesuree en TOURS tours. faire_tours entrelace les tours de toutes les
+    # mesures : la vitesse de la machine varie par periodes (frequence, voisins), chaque tour
+    # d'une mesure tombe ainsi dans une periode differente et le debit median n'est pas
+    # fausse par une seule d'entre elles.
+
+    def __init__(self, operation, repetitions=REPETITIONS, preparation=None, lot=LOT):
+        self.operation = operation
+        self.repetitions = repetitions
+        self.preparation = preparation
+        self.lot = lot
+        self.durees = []
+        self.debits = []
+
+    def etalonner(self, duree_lot=DUREE_LOT):
+        # agrandit les lots (et le nombre d'appels par tour) des operations trop courtes
+        duree = chronometrer(self.operation, 0, self.lot, self.preparation) / self.lot
+        self.lot = max(self.lot, -(-duree_lot // max(1, int(duree))))
+        self.repetitions = max(self.repetitions, self.lot * LOTS_PAR_TOUR)
+
+    def recommencer(self):
+        self.durees = []
+        self.debits = []
+
+    def tour(self):
+        # `preparation` est appelee hors chrono ; les durees gardees sont la duree moyenne
+        # d'un appel dans chaque lot
+        total = 0
+        for debut in range(0, self.repetitions, self.lot):
+            fin = min(self.repetitions, debut + self.lot)
+            duree = chronometrer(self.operation, debut, fin, self.preparation)
+            self.durees.append(duree / (fin - debut))
+            total += duree
+        self.debits.append(self.repetitions / (total / 1e9))
+
+    def resultat(self):
+        durees = sorted(self.durees)
+        debits = sorted(self.debits)
+        return {
+            "ops_s": debits[len(debits) // 2],
+            "p50_us": percentile(durees, 50) / 1000,
+            "p95_us": percentile(durees, 95) / 1000,
+            "p99_us": percentile(durees, 99) / 1000,
+        }
+
+
+def boucle_calibration(numero):
+    # Travail fixe en pur python, mesure comme les autres : la machine entiere peut aussi etre
+    # plus lente d'un lancement a l'autre, les debits sont compares relativement a celui-ci.
+    total = 0
+    for i in range(100):
+        total += i ^ numero
+    return total
+
+
+def mesurer_pieces(largeur, repetitions=REPETITIONS):
+    partie = Partie(list(range(largeur)))
+    piece = partie.piece_selectionnee
+    mouvements = [(1, 0), (0, 1), (-1, 0), (0, -1)]
+    # la piece est seule sur le plateau : place_on_plateau reussit partout ou elle arrive
+    return {
+        "deplacement": Mesure(lambda n: piece.deplacement(*mouvements[n % 4]), repetitions),
+        "rotate": Mesure(lambda n: piece.rotate(), repetitions),
+        "symetrie": Mesure(lambda n: piece.symetrie(), repetitions),
+        "place_on_Dplateau": Mesure(lambda n: piece.place_on_Dplateau(), repetitions),
+        "place_on_plateau": Mesure(lambda n: piece.place_on_plateau(), repetitions,
+                                   preparation=lambda n: piece.retirer()),
+        "verif_victoire": Mesure(lambda n: partie.verif_victoire(), repetitions),
+        "create_pieces": Mesure(lambda n: create_pieces(Plateau(largeur).clear, Bitplateau(largeur)),
+                                max(1, repetitions // 10)),
+    }
+
+
+def mesurer_images(jeu, pyxel, largeur, images=IMAGES, attente_max=30):
+    Pythominos = jeu
+    Pythominos.pieces_selectionnees = list(range(largeur))
+    Pythominos.mode_grand_chelem = False
+    Pythominos.musique = False
+    with contextlib.redirect_stdout(None):
+        ecran = Pythominos.Plateau_de_jeu(Plateau(largeur).clear)
+
+    # l'analyse de solvabilite du plateau vide tourne en arriere-plan : on l'attend
+    # pour qu'elle ne partage pas le processeur avec la mesure
+    fin_attente = time.perf_counter() + attente_max
+    while ecran.verificateur.en_cours and time.perf_counter() < fin_attente:
+        time.sleep(0.01)
+
+    def preparation(numero):
+        pyxel.frame_count = numero
+        pyxel.appuyer(SEQUENCE_TOUCHES[numero % len(SEQUENCE_TOUCHES)])
+
+    return {
+        "update": Mesure(lambda n: ecran.update(), images, preparation),
+        "draw": Mesure(lambda n: ecran.draw(), images, preparation),
+    }
+
+
+def preparer_mesures(largeurs=range(LARGEUR_MIN, LARGEUR_MAX + 1), repetitions=REPETITIONS, images=IMAGES):
+    pyxel = installer_pyxel_factice()
+    import Pythominos
+
+    mesures = {"calibration": Mesure(boucle_calibration)}
+    for largeur in largeurs:
+        for nom, mesure in {**mesurer_pieces(largeur, repetitions), **mesurer_images(Pythominos, pyxel, largeur, images)}.items():
+            mesures[f"{nom}/{largeur}"] = mesure
+    for mesure in mesures.values():
+        mesure.etalonner()
+    return pyxel, mesures
+
+def faire_tours(pyxel, mesures, afficher=print):
+    for mesure in mesures.values():
+        mesure.recommencer()
+    for tour in range(TOURS):
+        debut = time.perf_counter()
+        gc.collect()
+        for mesure in mesures.values():
+            mesure.tour()
+        afficher(f"Tour {tour + 1}/{TOURS} mesure en {time.perf_counter() - debut:.2f}s")
+    pyxel.appuyer(None)
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "resultats": {cle: mesure.resultat() for cle, mesure in mesures.items()},
+    }
+
+def lancer_benchmark(largeurs=range(LARGEUR_MIN, LARGEUR_MAX + 1), repetitions=REPETITIONS, images=IMAGES, afficher=print):
+    pyxel, mesures = preparer_mesures(largeurs, repetitions, images)
+    return faire_tours(pyxel, mesures, afficher)
+
+
+def meme_environnement(resultats, reference):
+    return (resultats["machine"], resultats["python"]) == (reference["machine"], reference["python"])
+
+def comparer(resultats, reference, seuil=SEUIL):
+    regressions = []
+    calibration = reference["resultats"].get("calibration")
+    if calibration is None:
+        return regressions
+    vitesse = resultats["resultats"]["calibration"]["ops_s"] / calibration["ops_s"]
+    for cle, mesure in resultats["resultats"].items():
+        ancienne = reference["resultats"].get(cle)
+        if ancienne is None or cle == "calibration":
+            continue
+        rapport = mesure["ops_s"] / (ancienne["ops_s"] * vitesse)
+        if rapport < 1 - seuil:
+            regressions.append((cle, ancienne["ops_s"], mesure["ops_s"], rapport))
+    return regressions
+
+def confirmer(pyxel, mesures, regressions, reference, afficher=print):
+    # remesure seules (avec la calibration) les mesures en regression : une periode lente de
+    # la machine pendant le premier passage ne se reproduit pas a l'identique
+    cles = ["calibration"] + [cle for cle, *_ in regressions]
+    afficher(f"Confirmation de {len(regressions)} regression(s)")
+    return comparer(faire_tours(pyxel, {cle: mesures[cle] for cle in cles}, afficher), reference)
+
+def afficher_resultats(resultats, afficher=print):
+    afficher(f"{'mesure':<24}{'ops/s':>12}{'p50 us':>10}{'p95 us':>10}{'p99 us':>10}")
+    for cle, mesure in resultats["resultats"].items():
+        afficher(f"{cle:<24}{mesure['ops_s']:>12.0f}{mesure['p50_us']:>10.1f}{mesure['p95_us']:>10.1f}{mesure['p99_us']:>10.1f}")
+
+def lire_json(fichier):
+    try:
+        with open(fichier) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def ecrire_json(donnees, fichier):
+    fichier_temporaire = fichier + ".tmp"
+    with open(fichier_temporaire, "w") as f:
+        json.dump(donnees, f, indent=1)
+    os.replace(fichier_temporaire, fichier)
+
+if __name__ == "__main__":
+    # python benchmark.py [--reference] [--sortie fichier.json] [largeurs...]
+    arguments = sys.argv[1:]
+    nouvelle_reference = "--reference" in arguments
+    arguments = [arg for arg in arguments if arg != "--reference"]
+    sortie = None
+    if "--sortie" in arguments:
+        position = arguments.index("--sortie")
+        sortie = arguments[position + 1]
+        del arguments[position:position + 2]
+    largeurs = [int(arg) for arg in arguments] if arguments else range(LARGEUR_MIN, LARGEUR_MAX + 1)
+
+    pyxel, mesures = preparer_mesures(largeurs)
+    resultats = faire_tours(pyxel, mesures)
+    afficher_resultats(resultats)
+    if sortie is not None:
+        ecrire_json(resultats, sortie)
+        print(f"Resultats ecrits dans {sortie}")
+
+    if nouvelle_reference:
+        ecrire_json(resultats, FICHIER_REFERENCE)
+        print(f"Reference ecrite dans {FICHIER_REFERENCE}")
+        sys.exit(0)
+
+    reference = lire_json(FICHIER_REFERENCE)
+    if reference is None:
+        print("Pas de reference : lancez python benchmark.py --reference pour en creer une")
+        sys.exit(0)
+    if not meme_environnement(resultats, reference):
+        print(f"Reference mesuree sur {reference['machine']} / python {reference['python']} : comparaison ignoree, "
+              f"lancez python benchmark.py --reference pour en creer une sur cette machine")
+        sys.exit(0)
+    regressions = comparer(resultats, reference)
+    if regressions:
+        regressions = confirmer(pyxel, mesures, regressions, reference)
+    if regressions:
+        for cle, ancienne, nouvelle, rapport in regressions:
+            print(f"REGRESSION {cle} : {ancienne:.0f} -> {nouvelle:.0f} ops/s ({(rapport - 1) * 100:+.0f}%)")
+        sys.exit(1)
+    print(f"Aucune regression par rapport a la reference du {reference['date']}")
@@ -0,0 +1,244 @@
+import os
+import sys
+import json
+import time
+import pickle
+import hashlib
+from collections import namedtuple
+
+DOSSIER = os.path.dirname(os.path.abspath(__file__))
+FICHIER_FORMES = os.path.join(DOSSIER, "formes.json")
+DOSSIER_CACHE = os.path.join(DOSSIER, "cache_formes")
+# a changer quand le contenu des tables compilees change
+VERSION_TABLES = 2
+# jeu de pieces du jeu classique, celui de orientations.py
+JEU_PAR_DEFAUT = "pentominos"
+# valeur d'une case hors du plateau dans une grille de jeu : elle compte comme occupee
+TROU = -1
+
+Placement = namedtuple("Placement", ["piece", "orientation", "x", "y", "masque", "cases"])
+# Tables d'un jeu de pieces : orientations[piece][orientation] est la forme, rotations et
+# symetries donnent l'orientation obtenue, dimensions la (hauteur, largeur) de chaque forme
+Jeu = namedtuple("Jeu", ["nom", "formes", "orientations", "rotations", "symetries", "dimensions"])
+# Plateau de forme quelconque : `cases` est l'ensemble des (ligne, colonne) jouables
+Forme = namedtuple("Forme", ["nom", "lignes", "colonnes", "cases"])
+
+
+def lire_definitions(fichier=FICHIER_FORMES):
+    with open(fichier) as f:
+        return json.load(f)
+
+def normaliser(cellules):
+    min_x = min(x for x, y in cellules)
+    min_y = min(y for x, y in cellules)
+    return tuple(sorted((x - min_x, y - min_y) for x, y in cellules))
+
+def tourner(forme):
+    return normaliser([(y, -x) for x, y in forme])
+
+def retourner(forme):
+    return normaliser([(x, -y) for x, y in forme])
+
+def cellules_motif(motif):
+    # "#" pour une case pleine, tout autre caractere pour un vide
+    return [(x, y) for x, ligne in enumerate(motif) for y, caractere in enumerate(ligne) if caractere == "#"]
+
+def forme_libre(forme):
+    # representant commun des 8 images d'une forme par rotation et symetrie
+    images = []
+    for _ in range(4):
+        forme = tourner(forme)
+        images += [forme, retourner(forme)]
+    return min(images)
+
+def polyominos_libres(taille):
+    # tous les polyominos de `taille` cases a rotation et symetrie pres, par croissance
+    formes = {((0, 0),)}
+    for _ in range(taille - 1):
+        suivantes = set()
+        for forme in formes:
+            for x, y in forme:
+                for voisine in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+                    if voisine not in forme:
+                        suivantes.add(forme_libre(normaliser(forme + (voisine,))))
+        formes = suivantes
+    return sorted(formes)
+
+def orientations_forme(forme):
+    # L'orientation 0 est la forme telle qu'elle est definie dans formes.json
+    formes = [normaliser(forme)]
+    a_explorer = [formes[0]]
+    while a_explorer:
+        courante = a_explorer.pop()
+        for voisine in (tourner(courante), retourner(courante)):
+            if voisine not in formes:
+                formes.append(voisine)
+                a_explorer.append(voisine)
+    return formes
+
+def compiler_jeu(nom, definition):
+    if "tous" in definition:
+        formes = polyominos_libres(definition["tous"])
+    else:
+        formes = [normaliser(cellules_motif(motif)) for motif in definition["pieces"]]
+    orientations, rotations, symetries, dimensions = [], [], [], []
+    for forme in formes:
+        liste = orientations_forme(forme)
+        orientations.append(liste)
+        rotations.append([liste.index(tourner(courante)) for courante in liste])
+        symetries.append([liste.index(retourner(courante)) for courante in liste])
+        dimensions.append([(max(x for x, y in courante) + 1, max(y for x, y in courante) + 1) for courante in liste])
+    return Jeu(nom, formes, orientations, rotations, symetries, dimensions)
+
+def rectangle(lignes, colonnes):
+    return Forme(f"{lignes}x{colonnes}", lignes, colonnes,
+                 frozenset((x, y) for x in range(lignes) for y in range(colonnes)))
+
+def compiler_plateau(nom, definition):
+    if "motif" in definition:
+        cases = cellules_motif(definition["motif"])
+        lignes = len(definition["motif"])
+        colonnes = max(len(ligne) for ligne in definition["motif"])
+    else:
+        lignes, colonnes = definition["lignes"], definition["colonnes"]
+        trous = {tuple(trou) for trou in definition.get("trous", [])}
+        cases = [(x, y) for x in range(lignes) for y in range(colonnes) if (x, y) not in trous]
+    return Forme(nom, lignes, colonnes, frozenset(cases))
+
+def compiler_placements(jeu, plateau):
+    # placements[piece] : toutes les positions de la piece entierement dans le plateau,
+    # cases numerotees x * colonnes + y comme pour Bitplateau
+    colonnes = plateau.colonnes
+    masque_forme = sum(1 << (x * colonnes + y) for x, y in plateau.cases)
+    resultat = []
+    for index_piece, formes in enumerate(jeu.orientations):
+        liste = []
+        for orientation, forme in enumerate(formes):
+            hauteur, largeur = jeu.dimensions[index_piece][orientation]
+            masque_origine = sum(1 << (dx * colonnes + dy) for dx, dy in forme)
+            for x in range(plateau.lignes - hauteur + 1):
+                for y in range(colonnes - largeur + 1):
+                    masque = masque_origine << (x * colonnes + y)
+                    if masque & masque_forme == masque:
+                        cases = tuple((x + dx) * colonnes + y + dy for dx, dy in forme)
+                        liste.append(Placement(index_piece, orientation, x, y, masque, cases))
+        resultat.append(liste)
+    return resultat
+
+
+class Tables:
+    # Jeu et plateau compiles ensemble : tout ce dont une partie a besoin pour poser, tourner
+    # et retourner les pieces. Les cases sont numerotees x * colonnes + y comme pour Bitplateau.
+
+    def __init__(self, jeu, plateau, placements=None):
+        self.jeu = jeu
+        self.plateau = plateau
+        self.placements = placements if placements is not None else compiler_placements(jeu, plateau)
+        colonnes = plateau.colonnes
+        # masques_formes[piece][orientation] : la forme ancree en (0, 0)
+        self.masques_formes = [[sum(1 << (x * colonnes + y) for x, y in forme) for forme in formes]
+                               for formes in jeu.orientations]
+        # masques_par_orientation[piece][orientation] : toutes les positions dans le plateau
+        self.masques_par_orientation = [[[] for _ in formes] for formes in jeu.orientations]
+        for liste in self.placements:
+            for placement in liste:
+                self.masques_par_orientation[placement.piece][placement.orientation].append(placement.masque)
+
+    def masque(self, index_piece, orientation, x, y):
+        return self.masques_formes[index_piece][orientation] << (x * self.plateau.colonnes + y)
+
+    def cases(self, index_piece, orientation, x, y):
+        return [[x + dx, y + dy] for dx, dy in self.jeu.orientations[index_piece][orientation]]
+
+    def dans_le_plateau(self, index_piece, orientation, x, y):
+        # dans le rectangle englobant : une piece peut passer au-dessus d'un trou, pas s'y poser
+        hauteur, largeur = self.jeu.dimensions[index_piece][orientation]
+        return 0 <= x and x + hauteur <= self.plateau.lignes and 0 <= y and y + largeur <= self.plateau.colonnes
+
+    def grille(self):
+        # plateau de jeu vide : 0 pour une case libre, TROU hors du plateau
+        cases = self.plateau.cases
+        return [[0 if (x, y) in cases else TROU for y in range(self.plateau.colonnes)]
+                for x in range(self.plateau.lignes)]
+
+def empreinte(*definitions):
+    texte = json.dumps([VERSION_TABLES, definitions], sort_keys=True)
+    return hashlib.sha1(texte.encode()).hexdigest()
+
+def ecrire_cache(chemin, tables):
+    os.makedirs(os.path.dirname(chemin), exist_ok=True)
+    fichier_temporaire = chemin + ".tmp"
+    with open(fichier_temporaire, "wb") as f:
+        pickle.dump(tables, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(fichier_temporaire, chemin)
+
+def lire_cache(chemin):
+    try:
+        with open(chemin, "rb") as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        return None
+
+def compiler_en_cache(dossier_cache, definitions, type_attendu, compiler):
+    # Le cache disque est indexe par l'empreinte des definitions : modifier formes.json
+    # recompile seulement ce qui a change.
+    chemin = os.path.join(dossier_cache, f"{empreinte(*definitions)}.pkl")
+    compilees = lire_cache(chemin)
+    if not isinstance(compilees, type_attendu):
+        compilees = compiler()
+        try:
+            ecrire_cache(chemin, compilees)
+        except OSError:
+            pass
+    return compilees
+
+_jeux = {}
+_tables = {}
+_rectangles = {}
+
+def jeu(nom_jeu=JEU_PAR_DEFAUT, fichier=FICHIER_FORMES, dossier_cache=DOSSIER_CACHE):
+    # tables d'un jeu de pieces seul, compilees a la premiere demande
+    cle = (nom_jeu, fichier)
+    if cle not in _jeux:
+        definition = lire_definitions(fichier)["jeux"][nom_jeu]
+        _jeux[cle] = compiler_en_cache(dossier_cache, ["jeu", definition], Jeu,
+                                       lambda: compiler_jeu(nom_jeu, definition))
+    return _jeux[cle]
+
+def tables(nom_jeu, nom_plateau, fichier=FICHIER_FORMES, dossier_cache=DOSSIER_CACHE):
+    # compile a la premiere demande seulement, puis en memoire et sur disque
+    cle = (nom_jeu, nom_plateau, fichier)
+    if cle not in _tables:
+        definitions = lire_definitions(fichier)
+        definition_jeu = definitions["jeux"][nom_jeu]
+        definition_plateau = definitions["plateaux"][nom_plateau]
+        _tables[cle] = compiler_en_cache(dossier_cache, [definition_jeu, definition_plateau], Tables,
+                                         lambda: Tables(jeu(nom_jeu, fichier, dossier_cache),
+                                                        compiler_plateau(nom_plateau, definition_plateau)))
+    return _tables[cle]
+
+def tables_rectangle(colonnes, lignes, nom_jeu=JEU_PAR_DEFAUT, fichier=FICHIER_FORMES):
+    # jeu sur un rectangle lignes x colonnes ; les placements se compilent en quelques
+    # millisecondes, ces tables ne sont gardees qu'en memoire
+    cle = (nom_jeu, fichier, lignes, colonnes)
+    if cle not in _rectangles:
+        _rectangles[cle] = Tables(jeu(nom_jeu, fichier), rectangle(lignes, colonnes))
+    return _rectangles[cle]
+
+
+if __name__ == "__main__":
+    # python bibliotheque.py [jeu] [plateau] : compile les tables et cherche une solution
+    from solveur import Probleme, afficher_solution
+    nom_jeu = sys.argv[1] if len(sys.argv) > 1 else "pentominos"
+    nom_plateau = sys.argv[2] if len(sys.argv) > 2 else "6x10"
+    debut = time.perf_counter()
+    compilees = tables(nom_jeu, nom_plateau)
+    print(f"{len(compilees.jeu.formes)} pieces, {sum(len(liste) for liste in compilees.placements)} placements "
+          f"sur {nom_plateau} ({(time.perf_counter() - debut) * 1000:.1f} ms)")
+    debut = time.perf_counter()
+    solution = next(Probleme(compilees).pavages(), None)
+    if solution is None:
+        print(f"Aucune solution ({time.perf_counter() - debut:.2f}s)")
+    else:
+        print(afficher_solution(compilees, solution))
+        print(f"Solution trouvee en {time.perf_counter() - debut:.2f}s")
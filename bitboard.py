@@ -0,0 +1,62 @@
+LIGNES = 5
+
+class Bitplateau:
+    # Plateau compact : la case (x, y) correspond au bit x * colonnes + y d'un entier.
+
+    def __init__(self, colonnes, lignes=LIGNES, occupe=0):
+        self.colonnes = colonnes
+        self.lignes = lignes
+        self.plein = (1 << (lignes * colonnes)) - 1
+        self.bits = [[1 << (x * colonnes + y) for y in range(colonnes)] for x in range(lignes)]
+        self.occupe = occupe
+        self.nb_vides = lignes * colonnes - bin(occupe).count("1")
+
+    @classmethod
+    def depuis_plateau(cls, plateau):
+        lignes = len(plateau)
+        colonnes = len(plateau[0]) if lignes > 0 else 0
+        bitplateau = cls(colonnes, lignes)
+        for x in range(lignes):
+            for y in range(colonnes):
+                if plateau[x][y] != 0:
+                    bitplateau.occupe |= bitplateau.bits[x][y]
+                    bitplateau.nb_vides -= 1
+        return bitplateau
+
+    def masque(self, cellules):
+        bits = self.bits
+        masque = 0
+        for x, y in cellules:
+            masque |= bits[x][y]
+        return masque
+
+    def libre(self, masque):
+        return self.occupe & masque == 0
+
+    def placer(self, masque):
+        self.nb_vides -= bin(masque & ~self.occupe).count("1")
+        self.occupe |= masque
+
+    def retirer(self, masque):
+        self.nb_vides += bin(masque & self.occupe).count("1")
+        self.occupe &= ~masque
+
+    def est_plein(self):
+        return self.nb_vides == 0
+
+    def verifier(self, plateau):
+        # mode de verification : compare le compteur et les bits a un parcours complet du plateau
+        occupe = 0
+        nb_vides = 0
+        for x in range(self.lignes):
+            for y in range(self.colonnes):
+                if plateau[x][y] != 0:
+                    occupe |= self.bits[x][y]
+                else:
+                    nb_vides += 1
+        if nb_vides != self.nb_vides or occupe != self.occupe:
+            raise AssertionError(f"Bitplateau incoherent : {self.nb_vides} cases vides comptees pour {nb_vides} "
+                                 f"sur le plateau, occupation {self.occupe:#x} au lieu de {occupe:#x}")
+
+    def cases_vides(self):
+        return self.plein & ~self.occupe
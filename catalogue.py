@@ -0,0 +1,70 @@
+import os
+import sys
+import time
+from itertools import combinations
+from concurrent.futures import ProcessPoolExecutor
+from solveur import resoudre
+from solvabilite import masque_pieces
+
+FICHIER_CATALOGUE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "catalogue_libre.bin")
+ENTETE = b"PYCL\x01"
+TAILLE_MIN = 3
+TAILLE_MAX = 12
+
+# Une entree par sous-ensemble des 12 pieces, indexee par son masque (bit i = piece i) :
+# le bit correspondant vaut 1 si le plateau 5 x n forme avec ces n pieces a une solution.
+
+def sous_ensembles(taille_min=TAILLE_MIN, taille_max=TAILLE_MAX):
+    return [pieces for n in range(taille_min, taille_max + 1) for pieces in combinations(range(12), n)]
+
+def tester_sous_ensemble(pieces):
+    return masque_pieces(pieces), resoudre(pieces) is not None
+
+def generer_catalogue(fichier=FICHIER_CATALOGUE, nb_processus=None, afficher=print):
+    bits = bytearray(1 << 12 >> 3)
+    debut = time.perf_counter()
+    liste = sous_ensembles()
+    nb_solvables = 0
+    with ProcessPoolExecutor(max_workers=nb_processus or os.cpu_count()) as executeur:
+        for numero, (masque, solvable) in enumerate(executeur.map(tester_sous_ensemble, liste, chunksize=16), 1):
+            if solvable:
+                bits[masque >> 3] |= 1 << (masque & 7)
+                nb_solvables += 1
+            if numero % 500 == 0:
+                afficher(f"{numero}/{len(liste)} combinaisons testees ({time.perf_counter() - debut:.1f}s)")
+
+    fichier_temporaire = fichier + ".tmp"
+    with open(fichier_temporaire, "wb") as f:
+        f.write(ENTETE + bytes(bits))
+    os.replace(fichier_temporaire, fichier)
+    afficher(f"{nb_solvables}/{len(liste)} combinaisons ont une solution, catalogue ecrit dans {fichier}")
+
+
+_catalogue = None
+
+def charger_catalogue(fichier=FICHIER_CATALOGUE):
+    global _catalogue
+    if _catalogue is None:
+        try:
+            with open(fichier, "rb") as f:
+                donnees = f.read()
+        except OSError:
+            donnees = b""
+        if donnees.startswith(ENTETE):
+            _catalogue = donnees[len(ENTETE):]
+        else:
+            _catalogue = b""
+    return _catalogue
+
+def est_solvable(pieces):
+    # None si le catalogue est absent ou si la taille n'y figure pas
+    if not TAILLE_MIN <= len(pieces) <= TAILLE_MAX or len(set(pieces)) != len(pieces):
+        return None
+    catalogue = charger_catalogue()
+    if not catalogue:
+        return None
+    masque = masque_pieces(pieces)
+    return bool(catalogue[masque >> 3] & (1 << (masque & 7)))
+
+if __name__ == "__main__":
+    generer_catalogue(nb_processus=int(sys.argv[1]) if len(sys.argv) > 1 else None)
@@ -0,0 +1,416 @@
+from collections import deque
+from niveaux import pieces_etape
+from bitboard import Bitplateau
+from bibliotheque import TROU
+import orientations
+
+# Verifie a chaque test de victoire que le Bitplateau correspond au plateau (lent, pour le debogage)
+mode_verification = False
+PROFONDEUR_HISTORIQUE = 256
+TAILLE_CACHE_POSITIONS = 4096
+
+def historise(action):
+    # action de Partie qui peut etre annulee puis refaite
+    def action_historisee(self, *args):
+        return self.historiser(action, *args)
+    return action_historisee
+
+class Plateau:
+    # `cases` : ensemble des (ligne, colonne) jouables, toutes par defaut ; les autres sont des trous
+
+    def __init__(self,taille: int, lignes=orientations.LIGNES, cases=None):
+        self.taille = taille
+        self.lignes = lignes
+        self.cases = cases
+        self.clear = self.plateau_clear()
+
+    def plateau_clear(self):
+        plateau = [[0 if self.cases is None or (x, y) in self.cases else TROU for y in range(self.taille)]
+                   for x in range(self.lignes)]
+        return plateau
+
+class Journal:
+    # Changements de l'action en cours, notes la ou ils se produisent : (appliquer, cle, avant,
+    # apres). Annuler rappelle appliquer(cle, avant) dans l'ordre inverse, refaire
+    # appliquer(cle, apres) dans l'ordre. Hors d'une action (`entree` a None) rien n'est garde.
+
+    def __init__(self):
+        self.entree = None
+
+    def noter(self, appliquer, cle, avant, apres):
+        if self.entree is not None and avant != apres:
+            self.entree.append((appliquer, cle, avant, apres))
+
+class Fantome:
+    # Apercu de la piece en cours de deplacement, commun a toutes les pieces : seules les
+    # cases de la derniere piece deplacee sont gardees, (ligne, colonne) -> numero.
+
+    def __init__(self, journal=None):
+        self.numero = 0
+        self.cases = {}
+        self.journal = journal if journal is not None else Journal()
+
+    def definir(self, cle, etat):
+        self.numero, self.cases = etat
+
+    def afficher(self, numero, cases):
+        avant = (self.numero, self.cases)
+        self.numero = numero
+        self.cases = {(x, y): numero for x, y in cases}
+        self.journal.noter(self.definir, None, avant, (self.numero, self.cases))
+
+    def effacer(self, numero):
+        if self.numero == numero and self.cases:
+            self.journal.noter(self.definir, None, (self.numero, self.cases), (self.numero, {}))
+            self.cases = {}
+
+    def valeur(self, x, y):
+        return self.cases.get((x, y), 0)
+
+class Partie:
+    # Regles du jeu sans aucune dependance a pyxel : le front-end (ou un script) appelle
+    # les actions et traduit leur resultat en sons et en messages.
+
+    # `tables` (bibliotheque.Tables) donne le jeu de pieces et la forme du plateau ; par defaut
+    # les pentominos sur un rectangle de la taille de `plateau`.
+
+    def __init__(self, pieces_selectionnees, plateau=None, etape=None, mode_grand_chelem=False, niveau_grand_chelem=0,
+                 profondeur_historique=PROFONDEUR_HISTORIQUE, tables=None):
+        if plateau is None:
+            if tables is not None:
+                forme = tables.plateau
+                plateau = Plateau(forme.colonnes, forme.lignes, forme.cases).clear
+            else:
+                plateau = Plateau(len(pieces_selectionnees)).clear
+        self.pieces_selectionnees = list(pieces_selectionnees)
+        self.mode_grand_chelem = mode_grand_chelem
+        self.niveau_grand_chelem = niveau_grand_chelem
+        self.etape = etape if etape is not None else len(self.pieces_selectionnees)
+
+        self.plateau = plateau
+        self.journal = Journal()
+        self.fantome = Fantome(self.journal)
+        self.ligne = len(self.plateau)
+        self.cols = len(self.plateau[0]) if self.ligne > 0 else 0
+        self.tables = tables if tables is not None else orientations.rectangle(self.cols, self.ligne)
+        self.bitplateau = Bitplateau.depuis_plateau(self.plateau)
+        self.pieces = create_pieces(self.plateau, self.bitplateau, self.fantome, self.journal, self.tables)
+        self.pieces_jouables = [[self.pieces[piece_idx],False,False] for piece_idx in self.pieces_selectionnees]
+        if not self.pieces_jouables:
+            self.index_piece_selectionnee = -1
+            self.piece_selectionnee = None
+        else:
+            self.index_piece_selectionnee = 0
+            self.piece_selectionnee = self.pieces_jouables[self.index_piece_selectionnee][0]
+        self.index_pieces_non_jouables = [i for i in range(len(self.pieces)) if i not in self.pieces_selectionnees]
+
+        # Chaque entree est la liste des changements notes dans le journal pendant l'action :
+        # positions et etats des pieces, cases ecrites, drapeaux, selection et fantome.
+        self.historique = deque(maxlen=profondeur_historique)
+        self.annulees = []
+        self.cache_positions = {}
+
+    def historiser(self, action, *args):
+        # une action appelee par une autre fait partie de la meme entree
+        if self.journal.entree is not None:
+            return action(self, *args)
+        entree = self.journal.entree = []
+        try:
+            resultat = action(self, *args)
+        finally:
+            self.journal.entree = None
+        if entree:
+            self.historique.append(entree)
+            self.annulees.clear()
+        return resultat
+
+    def annuler(self):
+        if not self.historique:
+            return False
+        entree = self.historique.pop()
+        for appliquer, cle, avant, _ in reversed(entree):
+            appliquer(cle, avant)
+        self.annulees.append(entree)
+        return True
+
+    def refaire(self):
+        if not self.annulees:
+            return False
+        entree = self.annulees.pop()
+        for appliquer, cle, _, apres in entree:
+            appliquer(cle, apres)
+        self.historique.append(entree)
+        return True
+
+    def definir_drapeau(self, cle, valeur):
+        numero, colonne = cle
+        self.pieces_jouables[numero][colonne] = valeur
+
+    def marquer(self, numero, posee=None, modifiee=None):
+        # change les drapeaux (posee, modifiee) de pieces_jouables[numero] en les notant
+        jouable = self.pieces_jouables[numero]
+        for colonne, valeur in ((1, posee), (2, modifiee)):
+            if valeur is not None:
+                self.journal.noter(self.definir_drapeau, (numero, colonne), jouable[colonne], valeur)
+                jouable[colonne] = valeur
+
+    def definir_selection(self, cle, index_piece_selectionnee):
+        self.index_piece_selectionnee = index_piece_selectionnee
+        self.piece_selectionnee = self.pieces_jouables[index_piece_selectionnee][0] if index_piece_selectionnee >= 0 else None
+
+    def positions_legales(self):
+        # (nombre, union des cases) des positions libres de la piece selectionnee dans son
+        # orientation actuelle ; la piece elle-meme ne se gene pas si elle est sur le plateau
+        piece = self.piece_selectionnee
+        if piece is None:
+            return 0, 0
+        occupe = self.bitplateau.occupe
+        if not piece.etat_deplacement and all(self.plateau[x][y] == piece.numero for x, y in piece.cos_actuelles):
+            occupe &= ~piece.masque()
+        cle = (piece.index, piece.orientation, occupe)
+        resultat = self.cache_positions.get(cle)
+        if resultat is None:
+            nombre = 0
+            union = 0
+            for masque in self.tables.masques_par_orientation[piece.index][piece.orientation]:
+                if not occupe & masque:
+                    nombre += 1
+                    union |= masque
+            if len(self.cache_positions) >= TAILLE_CACHE_POSITIONS:
+                self.cache_positions.clear()
+            resultat = self.cache_positions[cle] = (nombre, union)
+        return resultat
+
+    def verif_victoire(self):
+        if mode_verification:
+            self.bitplateau.verifier(self.plateau)
+        return self.bitplateau.est_plein()
+
+    def derniere_etape(self):
+        return self.etape == 12
+
+    def pieces_etape_suivante(self):
+        if not self.mode_grand_chelem or self.derniere_etape():
+            return None
+        return pieces_etape(self.niveau_grand_chelem, len(self.pieces_selectionnees) + 1)
+
+    def pieces_posees(self):
+        return [piece[0] for piece in self.pieces_jouables if piece[1]]
+
+    def placements(self):
+        # pieces reellement sur le plateau : (piece, orientation, x, y)
+        return [(piece.index, piece.orientation, piece.ancre[0], piece.ancre[1])
+                for piece in self.pieces_posees() if not piece.etat_deplacement]
+
+    def restaurer(self, placements):
+        for index_piece, orientation, x, y in placements:
+            self.poser(index_piece, orientation, x, y)
+        if self.pieces_jouables:
+            self.selectionner(0)
+        self.historique.clear()
+        self.annulees.clear()
+
+    @historise
+    def effacer(self):
+        for numero, piece in enumerate(self.pieces_jouables):
+            self.marquer(numero, False, False)
+            piece[0].retirer()
+            piece[0].cos_de_départ()
+
+    @historise
+    def retirer(self):
+        self.piece_selectionnee.retirer()
+        self.marquer(self.index_piece_selectionnee, False, False)
+
+    @historise
+    def placer(self):
+        self.plateau, success = self.piece_selectionnee.place_on_plateau()
+        if success:
+            self.marquer(self.index_piece_selectionnee, True, True)
+        return success
+
+    def modifier(self, resultat):
+        _, success = resultat
+        if success:
+            self.marquer(self.index_piece_selectionnee, modifiee=True)
+        return success
+
+    @historise
+    def tourner(self):
+        return self.modifier(self.piece_selectionnee.rotate())
+
+    @historise
+    def retourner(self):
+        return self.modifier(self.piece_selectionnee.symetrie())
+
+    @historise
+    def deplacer(self, dy, dx):
+        return self.modifier(self.piece_selectionnee.deplacement(dy, dx))
+
+    @historise
+    def positionner(self, orientation, x, y):
+        return self.modifier(self.piece_selectionnee.changer_position(orientation, x, y))
+
+    @historise
+    def selectionner(self, index_piece_selectionnee):
+        self.journal.noter(self.definir_selection, None, self.index_piece_selectionnee, index_piece_selectionnee)
+        self.definir_selection(None, index_piece_selectionnee)
+        if self.pieces_jouables[self.index_piece_selectionnee][1]:
+            self.piece_selectionnee.changer_etat(False)
+        else:
+            self.piece_selectionnee.changer_etat(True)
+
+    @historise
+    def piece_suivante(self):
+        # Renvoie "posee" si la piece deplacee a ete posee sur le plateau, "deplacee" si elle n'y
+        # a jamais ete amenee, "retiree" si elle a du etre enlevee faute de place, None si la
+        # piece n'etait pas en cours de deplacement.
+        suivante = (self.index_piece_selectionnee + 1) % len(self.pieces_jouables)
+        if not self.piece_selectionnee.etat_deplacement:
+            self.selectionner(suivante)
+            return None
+        if self.piece_selectionnee.test_placement():
+            resultat = "deplacee"
+            if self.pieces_jouables[self.index_piece_selectionnee][2]:
+                self.piece_selectionnee.place_on_plateau()
+                self.marquer(self.index_piece_selectionnee, posee=True)
+                resultat = "posee"
+            self.selectionner(suivante)
+            return resultat
+        self.piece_selectionnee.retirer()
+        self.marquer(self.index_piece_selectionnee, posee=False)
+        self.selectionner(suivante)
+        return "retiree"
+
+    @historise
+    def poser(self, index_piece, orientation, x, y):
+        # Pose directe d'une piece, pour les scripts et les simulations
+        for numero, piece in enumerate(self.pieces_jouables):
+            if piece[0].index == index_piece:
+                if numero != self.index_piece_selectionnee:
+                    self.selectionner(numero)
+                return self.positionner(orientation, x, y) and self.placer()
+        return False
+
+class Piece:
+    def __init__(self, numero, tables, plateau, bitplateau=None, fantome=None, journal=None):
+        self.numero = numero
+        self.tables = tables
+
+        self.plateau = plateau
+        self.bitplateau = bitplateau
+        self.journal = journal if journal is not None else Journal()
+        self.fantome = fantome if fantome is not None else Fantome(self.journal)
+
+        self.etat_deplacement = False
+        self.index = numero - 1
+        self.orientation = 0
+        self.ancre = (0, 0)
+        self.cos_actuelles = self.cos_de_départ()
+
+    def cos_de_départ(self):
+        return self.tables.cases(self.index, 0, 0, 0)
+
+    def masque(self):
+        return self.tables.masque(self.index, self.orientation, self.ancre[0], self.ancre[1])
+
+    def definir_etat(self, cle, etat_deplacement):
+        self.etat_deplacement = etat_deplacement
+
+    def changer_etat(self, etat_deplacement):
+        self.journal.noter(self.definir_etat, None, self.etat_deplacement, etat_deplacement)
+        self.etat_deplacement = etat_deplacement
+
+    def definir_position(self, cle, position):
+        self.orientation, self.ancre, self.cos_actuelles = position
+
+    def ecrire_cases(self, cases, valeurs):
+        # une valeur par case : numero de la piece qui l'occupe, ou 0
+        pleines = vides = 0
+        bits = self.bitplateau.bits if self.bitplateau is not None else None
+        for (x, y), valeur in zip(cases, valeurs):
+            self.plateau[x][y] = valeur
+            if bits is not None:
+                if valeur:
+                    pleines |= bits[x][y]
+                else:
+                    vides |= bits[x][y]
+        if bits is not None:
+            self.bitplateau.placer(pleines)
+            self.bitplateau.retirer(vides)
+
+    def changer_cases(self, valeur):
+        # ecrit `valeur` sur les cases de la piece ; le journal garde ce qu'elles contenaient
+        cases = self.cos_actuelles
+        avant = tuple(self.plateau[x][y] for x, y in cases)
+        apres = (valeur,) * len(cases)
+        self.journal.noter(self.ecrire_cases, cases, avant, apres)
+        self.ecrire_cases(cases, apres)
+    
+    def place_on_Dplateau(self):
+        if not self.etat_deplacement:
+            self.changer_cases(0)
+            self.changer_etat(True)
+
+        self.fantome.afficher(self.numero, self.cos_actuelles)
+        return self.fantome
+    
+    def test_placement(self):
+        if self.bitplateau is not None:
+            return self.bitplateau.libre(self.masque())
+        if all( self.plateau[x][y] == 0  for x, y in self.cos_actuelles):
+            return True
+        else:
+            return False
+        
+    def place_on_plateau(self):
+        if not self.test_placement():
+            return self.plateau, False
+        
+        if self.etat_deplacement:
+            self.fantome.effacer(self.numero)
+        self.changer_cases(self.numero)
+        self.changer_etat(False)
+        return self.plateau, True
+        
+    def retirer(self):
+        if self.etat_deplacement:
+            self.fantome.effacer(self.numero)
+        else :
+            self.changer_cases(0)
+        self.changer_etat(True)
+
+    def changer_position(self, orientation, x, y):
+        self.place_on_Dplateau()
+        if self.tables.dans_le_plateau(self.index, orientation, x, y):
+            position = (orientation, (x, y), self.tables.cases(self.index, orientation, x, y))
+            self.journal.noter(self.definir_position, None, (self.orientation, self.ancre, self.cos_actuelles), position)
+            self.definir_position(None, position)
+            return self.place_on_Dplateau(), True
+        return self.place_on_Dplateau(), False
+
+    def deplacement(self, dy, dx):
+        return self.changer_position(self.orientation, self.ancre[0] + dx, self.ancre[1] + dy)
+    
+    def rotate(self):
+        jeu = self.tables.jeu
+        orientation = jeu.rotations[self.index][self.orientation]
+        hauteur, largeur = jeu.dimensions[self.index][self.orientation]
+        nouvelle_hauteur, nouvelle_largeur = jeu.dimensions[self.index][orientation]
+        x = self.ancre[0] + (hauteur - nouvelle_hauteur) // 2
+        y = self.ancre[1] + (largeur - nouvelle_largeur) // 2
+        return self.changer_position(orientation, x, y)
+        
+    def symetrie(self):
+        return self.changer_position(self.tables.jeu.symetries[self.index][self.orientation], self.ancre[0], self.ancre[1])
+
+def create_pieces(plateau, bitplateau=None, fantome=None, journal=None, tables=None):
+    # une piece par forme du jeu de `tables` (les pentominos par defaut)
+    if tables is None:
+        tables = orientations.rectangle(len(plateau[0]), len(plateau))
+    if journal is None:
+        journal = fantome.journal if fantome is not None else Journal()
+    if fantome is None:
+        fantome = Fantome(journal)
+    pieces = [Piece(numero + 1, tables, plateau, bitplateau, fantome, journal) for numero in range(len(tables.jeu.formes))]
+    return pieces
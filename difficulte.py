@@ -0,0 +1,101 @@
+import os
+import sys
+import time
+import struct
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from solveur import Probleme, compter_solutions_distinctes
+from orientations import rectangle
+from solvabilite import masque_pieces
+from catalogue import sous_ensembles
+from niveaux import grand_chelem, pieces_etape
+
+FICHIER_DIFFICULTE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "difficulte.bin")
+ENTETE = b"PYDF\x01"
+
+# Un enregistrement de taille fixe par sous-ensemble des 12 pieces, a l'indice de son masque :
+# present, solutions distinctes, noeuds jusqu'a la premiere solution, noeuds pour toutes
+# les compter, nombre de choix pour la case la plus contrainte avant le premier placement.
+ENREGISTREMENT = struct.Struct("<BIIIH")
+
+Difficulte = namedtuple("Difficulte", ["solutions", "noeuds_premiere_solution", "noeuds_total", "branchement", "score"])
+
+def analyser(pieces):
+    pieces = list(pieces)
+    # sans elagage : les noeuds de la recherche brute sont la mesure de difficulte de la base
+    moteur = Probleme(rectangle(len(pieces)), pieces).moteur(elaguer=False)
+    branchement = moteur.branchement()
+    trouve = next(moteur.solutions(), None) is not None
+    noeuds_premiere_solution = moteur.noeuds
+    if trouve:
+        solutions, noeuds_total = compter_solutions_distinctes(pieces)
+    else:
+        solutions, noeuds_total = 0, noeuds_premiere_solution
+    return masque_pieces(pieces), (1, solutions, noeuds_premiere_solution, noeuds_total, branchement)
+
+def generer_base(fichier=FICHIER_DIFFICULTE, nb_processus=None, afficher=print):
+    donnees = bytearray(ENREGISTREMENT.size << 12)
+    debut = time.perf_counter()
+    liste = sous_ensembles()
+    # les plus gros plateaux d'abord pour que les processus finissent ensemble
+    liste.sort(key=len, reverse=True)
+    with ProcessPoolExecutor(max_workers=nb_processus or os.cpu_count()) as executeur:
+        for numero, (masque, valeurs) in enumerate(executeur.map(analyser, liste), 1):
+            ENREGISTREMENT.pack_into(donnees, masque * ENREGISTREMENT.size, *valeurs)
+            if numero % 100 == 0:
+                afficher(f"{numero}/{len(liste)} plateaux analyses ({time.perf_counter() - debut:.1f}s)")
+
+    fichier_temporaire = fichier + ".tmp"
+    with open(fichier_temporaire, "wb") as f:
+        f.write(ENTETE + bytes(donnees))
+    os.replace(fichier_temporaire, fichier)
+    afficher(f"{len(liste)} plateaux analyses en {time.perf_counter() - debut:.1f}s, base ecrite dans {fichier}")
+
+
+_base = None
+
+def charger_base(fichier=FICHIER_DIFFICULTE):
+    global _base
+    if _base is None:
+        try:
+            with open(fichier, "rb") as f:
+                donnees = f.read()
+        except OSError:
+            donnees = b""
+        if donnees.startswith(ENTETE) and len(donnees) == len(ENTETE) + (ENREGISTREMENT.size << 12):
+            _base = memoryview(donnees)[len(ENTETE):]
+        else:
+            _base = memoryview(b"")
+    return _base
+
+def difficulte(pieces):
+    if len(set(pieces)) != len(pieces):
+        return None
+    base = charger_base()
+    if not base:
+        return None
+    present, solutions, noeuds_premiere_solution, noeuds_total, branchement = \
+        ENREGISTREMENT.unpack_from(base, masque_pieces(pieces) * ENREGISTREMENT.size)
+    if not present:
+        return None
+    # effort moyen de recherche par solution distincte : plus il est grand, plus le plateau est dur
+    score = noeuds_total / solutions if solutions else float("inf")
+    return Difficulte(solutions, noeuds_premiere_solution, noeuds_total, branchement, score)
+
+def difficultes(liste_pieces):
+    return [difficulte(pieces) for pieces in liste_pieces]
+
+def difficulte_serie(serie):
+    etapes = difficultes([pieces_etape(serie, etape) for etape in range(4, 13)])
+    if any(etape is None for etape in etapes):
+        return None
+    return sum(etape.score for etape in etapes)
+
+def series_par_difficulte():
+    scores = [difficulte_serie(serie) for serie in range(len(grand_chelem))]
+    if any(score is None for score in scores):
+        return list(range(len(grand_chelem)))
+    return sorted(range(len(grand_chelem)), key=lambda serie: scores[serie])
+
+if __name__ == "__main__":
+    generer_base(nb_processus=int(sys.argv[1]) if len(sys.argv) > 1 else None)
@@ -0,0 +1,195 @@
+import os
+import time
+import shutil
+import struct
+import pyxel
+from sauvegarde import DOSSIER_SAUVEGARDES
+
+ENTETE = b"PYEN"
+VERSION = 2
+GRAINE = struct.Struct("<Q")
+# Version 2 : la graine est suivie d'une copie des fichiers de sauvegarde du debut de la
+# partie (nombre de fichiers, puis pour chacun longueur du nom, longueur du contenu, nom, contenu)
+NB_FICHIERS = struct.Struct("<H")
+FICHIER = struct.Struct("<BI")
+# Un evenement : images ecoulees depuis le precedent, puis indice de touche * 2 + appuyee
+EVENEMENT = struct.Struct("<HB")
+ECART_MAX = 0xFFFF
+ATTENTE = 0x7F
+FIN = 0x7E
+
+# Toutes les touches lues par le jeu ; leur position dans la liste est ce qui est ecrit,
+# les nouvelles touches s'ajoutent donc a la fin
+TOUCHES = ["KEY_A", "KEY_C", "KEY_D", "KEY_DOWN", "KEY_E", "KEY_F3", "KEY_G", "KEY_L", "KEY_LEFT",
+           "KEY_M", "KEY_N", "KEY_P", "KEY_Q", "KEY_R", "KEY_RETURN", "KEY_RIGHT", "KEY_S", "KEY_SPACE",
+           "KEY_UP", "KEY_X", "KEY_Z", "KEY_U", "KEY_Y", "KEY_H", "KEY_T"]
+
+
+class EtatTouches:
+    # Remplace btn, btnp et btnr de pyxel a partir des seuls appuis et relachements, pour
+    # que la partie enregistree et sa relecture voient exactement les memes reponses.
+
+    def __init__(self):
+        self.indices = {getattr(pyxel, nom): indice for indice, nom in enumerate(TOUCHES)}
+        self.image = -1
+        self.appuis = {}
+        self.relachements = {}
+
+    def appliquer(self, indice, appuyee):
+        if appuyee:
+            self.appuis[indice] = self.image
+        else:
+            self.appuis.pop(indice, None)
+            self.relachements[indice] = self.image
+
+    def btn(self, touche):
+        return self.indices.get(touche) in self.appuis
+
+    def btnp(self, touche, hold=0, repeat=0):
+        debut = self.appuis.get(self.indices.get(touche))
+        if debut is None:
+            return False
+        if debut == self.image:
+            return True
+        duree = self.image - debut - hold
+        return repeat > 0 and duree >= 0 and duree % repeat == 0
+
+    def btnr(self, touche):
+        return self.relachements.get(self.indices.get(touche)) == self.image
+
+    def installer(self):
+        pyxel.btn = self.btn
+        pyxel.btnp = self.btnp
+        pyxel.btnr = self.btnr
+
+
+def photographier(dossier):
+    # contenu des sauvegardes de `dossier` ; les .tmp sont des ecritures atomiques en cours
+    fichiers = {}
+    if not os.path.isdir(dossier):
+        return fichiers
+    for nom in sorted(os.listdir(dossier)):
+        chemin = os.path.join(dossier, nom)
+        if nom.endswith(".tmp") or not os.path.isfile(chemin):
+            continue
+        try:
+            with open(chemin, "rb") as f:
+                fichiers[nom] = f.read()
+        except FileNotFoundError:
+            continue
+    return fichiers
+
+def ecrire_fichiers(flux, fichiers):
+    flux.write(NB_FICHIERS.pack(len(fichiers)))
+    for nom, contenu in fichiers.items():
+        nom = nom.encode()
+        flux.write(FICHIER.pack(len(nom), len(contenu)) + nom + contenu)
+
+def lire_fichiers(flux):
+    (nombre,) = NB_FICHIERS.unpack(flux.read(NB_FICHIERS.size))
+    fichiers = {}
+    for _ in range(nombre):
+        longueur_nom, longueur = FICHIER.unpack(flux.read(FICHIER.size))
+        nom = flux.read(longueur_nom).decode()
+        fichiers[nom] = flux.read(longueur)
+    return fichiers
+
+
+class Enregistreur:
+    # Lit le clavier a chaque image et ecrit les changements au fil de l'eau. Les sauvegardes
+    # existantes sont copiees dans l'entete : la relecture charge exactement les memes.
+
+    def __init__(self, fichier, graine=None, dossier_sauvegardes=DOSSIER_SAUVEGARDES):
+        self.graine = graine if graine is not None else time.time_ns() & 0xFFFFFFFFFFFFFFFF
+        self.lire_touche = pyxel.btn
+        self.etat = EtatTouches()
+        self.codes = [getattr(pyxel, nom) for nom in TOUCHES]
+        self.derniere_image = 0
+        self.flux = open(fichier, "wb")
+        self.flux.write(ENTETE + bytes([VERSION]) + GRAINE.pack(self.graine))
+        ecrire_fichiers(self.flux, photographier(dossier_sauvegardes))
+        self.etat.installer()
+
+    def ecrire(self, valeur):
+        ecart = self.etat.image - self.derniere_image
+        while ecart > ECART_MAX:
+            self.flux.write(EVENEMENT.pack(ECART_MAX, ATTENTE << 1))
+            ecart -= ECART_MAX
+        self.flux.write(EVENEMENT.pack(ecart, valeur))
+        self.derniere_image = self.etat.image
+
+    def image_suivante(self):
+        etat = self.etat
+        etat.image += 1
+        for indice, code in enumerate(self.codes):
+            appuyee = self.lire_touche(code)
+            if appuyee != (indice in etat.appuis):
+                etat.appliquer(indice, appuyee)
+                self.ecrire(indice << 1 | appuyee)
+
+    def fermer(self):
+        if not self.flux.closed:
+            self.ecrire(FIN << 1)
+            self.flux.close()
+
+
+def lire_evenements(flux):
+    # (image, indice de touche, appuyee) dans l'ordre, sans charger le fichier entier ;
+    # le dernier evenement, d'indice FIN, donne la derniere image de la partie
+    image = 0
+    while True:
+        octets = flux.read(EVENEMENT.size)
+        if len(octets) < EVENEMENT.size:
+            return
+        ecart, valeur = EVENEMENT.unpack(octets)
+        image += ecart
+        indice = valeur >> 1
+        if indice != ATTENTE:
+            yield image, indice, bool(valeur & 1)
+        if indice == FIN:
+            return
+
+
+class Lecteur:
+
+    def __init__(self, fichier):
+        self.flux = open(fichier, "rb")
+        entete = self.flux.read(len(ENTETE) + 1 + GRAINE.size)
+        if not entete.startswith(ENTETE) or entete[len(ENTETE)] not in (1, VERSION):
+            raise ValueError(f"{fichier} n'est pas un enregistrement de partie")
+        (self.graine,) = GRAINE.unpack_from(entete, len(ENTETE) + 1)
+        # None pour un enregistrement de version 1, qui ne contient pas les sauvegardes
+        self.sauvegardes = lire_fichiers(self.flux) if entete[len(ENTETE)] >= 2 else None
+        self.evenements = lire_evenements(self.flux)
+        self.prochain = next(self.evenements, None)
+        self.termine = self.prochain is None
+        self.etat = EtatTouches()
+        self.etat.installer()
+
+    def image_suivante(self):
+        etat = self.etat
+        etat.image += 1
+        while self.prochain is not None and self.prochain[0] <= etat.image:
+            _, indice, appuyee = self.prochain
+            if indice == FIN:
+                self.termine = True
+            else:
+                etat.appliquer(indice, appuyee)
+            self.prochain = next(self.evenements, None)
+        if self.prochain is None:
+            # enregistrement interrompu sans evenement de fin
+            self.termine = True
+
+    def restaurer_sauvegardes(self, dossier, source=DOSSIER_SAUVEGARDES):
+        # remplit `dossier` avec les sauvegardes du debut de la partie enregistree
+        os.makedirs(dossier, exist_ok=True)
+        if self.sauvegardes is None:
+            if os.path.isdir(source):
+                shutil.copytree(source, dossier, dirs_exist_ok=True, ignore=shutil.ignore_patterns("*.tmp"))
+            return
+        for nom, contenu in self.sauvegardes.items():
+            with open(os.path.join(dossier, nom), "wb") as f:
+                f.write(contenu)
+
+    def fermer(self):
+        self.flux.close()
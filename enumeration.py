@@ -0,0 +1,165 @@
+import os
+import sys
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from solveur import Probleme
+from bibliotheque import tables
+
+# Nombre de choix imposes par tache : chaque niveau multiplie le nombre de taches par le
+# nombre de choix de la colonne la plus contrainte (de l'ordre de 10 a 60)
+PROFONDEUR_DECOUPAGE = 2
+LETTRES = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789"
+
+
+def premiers_noeuds(moteur):
+    # premier noeud de chaque rangee de la matrice
+    premiers = {}
+    for noeud in range(len(moteur.C)):
+        if moteur.ligne[noeud] >= 0:
+            premiers.setdefault(moteur.ligne[noeud], noeud)
+    return premiers
+
+def forcer(moteur, noeud):
+    # impose la rangee du noeud, exactement comme un choix de DancingLinks.chercher
+    moteur.couvrir(moteur.C[noeud])
+    j = moteur.D[noeud]
+    while j != noeud:
+        moteur.couvrir(moteur.C[j])
+        j = moteur.D[j]
+    if moteur.geo is not None:
+        moteur.vides ^= moteur.masques[moteur.ligne[noeud]]
+
+def liberer(moteur, noeud):
+    if moteur.geo is not None:
+        moteur.vides ^= moteur.masques[moteur.ligne[noeud]]
+    j = moteur.G[noeud]
+    while j != noeud:
+        moteur.decouvrir(moteur.C[j])
+        j = moteur.G[j]
+    moteur.decouvrir(moteur.C[noeud])
+
+def colonne_la_plus_contrainte(moteur):
+    colonne = None
+    for c in moteur.colonnes_actives():
+        if colonne is None or moteur.taille[c] < moteur.taille[colonne]:
+            colonne = c
+    return colonne
+
+def decouper(moteur, profondeur, impose=()):
+    # Taches : listes de rangees a imposer. On suit les memes choix que la recherche, la
+    # colonne la plus contrainte d'abord, pour que les taches couvrent tout l'arbre une fois.
+    colonne = colonne_la_plus_contrainte(moteur)
+    if profondeur == 0 or colonne is None:
+        yield list(impose)
+        return
+    noeud = moteur.B[colonne]
+    while noeud != colonne:
+        forcer(moteur, noeud)
+        yield from decouper(moteur, profondeur - 1, impose + (moteur.ligne[noeud],))
+        liberer(moteur, noeud)
+        noeud = moteur.B[noeud]
+
+def taches(nom_jeu, nom_plateau, profondeur=PROFONDEUR_DECOUPAGE):
+    return list(decouper(Probleme(tables(nom_jeu, nom_plateau)).moteur(), profondeur))
+
+def texte_solution(compilees, solution):
+    # une ligne par solution : une lettre par case et par piece, "." pour un trou, "/" entre les lignes
+    plateau = compilees.plateau
+    grille = [["." for _ in range(plateau.colonnes)] for _ in range(plateau.lignes)]
+    for placement in solution:
+        for case in placement.cases:
+            grille[case // plateau.colonnes][case % plateau.colonnes] = LETTRES[placement.piece]
+    return "/".join("".join(ligne) for ligne in grille)
+
+_moteurs = {}
+
+def resoudre_tache(nom_jeu, nom_plateau, impose):
+    # Dans un processus du pool : toutes les solutions qui commencent par les rangees imposees.
+    # La matrice est construite une fois par processus ; la recherche la rend intacte et les
+    # rangees imposees sont liberees a la fin, elle sert donc pour toutes les taches suivantes.
+    cle = (nom_jeu, nom_plateau)
+    if cle not in _moteurs:
+        compilees = tables(nom_jeu, nom_plateau)
+        probleme = Probleme(compilees)
+        moteur = probleme.moteur()
+        _moteurs[cle] = (compilees, moteur, probleme.placements, premiers_noeuds(moteur))
+    compilees, moteur, candidats, premiers = _moteurs[cle]
+    moteur.noeuds = 0
+    for numero_rangee in impose:
+        forcer(moteur, premiers[numero_rangee])
+    solutions = [texte_solution(compilees, [candidats[r] for r in impose + choix]) for choix in moteur.solutions()]
+    for numero_rangee in reversed(impose):
+        liberer(moteur, premiers[numero_rangee])
+    return solutions, moteur.noeuds
+
+
+def lire_reprise(fichier):
+    try:
+        with open(fichier) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def ecrire_reprise(fichier, etat):
+    fichier_temporaire = fichier + ".tmp"
+    with open(fichier_temporaire, "w") as f:
+        json.dump(etat, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(fichier_temporaire, fichier)
+
+def enumerer(nom_jeu, nom_plateau, sortie, nb_processus=None, profondeur=PROFONDEUR_DECOUPAGE, afficher=print):
+    # Les taches sont distribuees une a une aux processus libres. A chaque tache terminee, ses
+    # solutions sont ajoutees a `sortie` puis le point de reprise est mis a jour : un calcul
+    # interrompu reprend apres la derniere tache enregistree, en tronquant `sortie` a cet endroit.
+    liste = taches(nom_jeu, nom_plateau, profondeur)
+    fichier_reprise = sortie + ".reprise.json"
+    etat = lire_reprise(fichier_reprise)
+    if (etat is None or (etat["jeu"], etat["plateau"], etat["taches"]) != (nom_jeu, nom_plateau, len(liste))
+            or not os.path.exists(sortie)):
+        etat = {"jeu": nom_jeu, "plateau": nom_plateau, "taches": len(liste), "faites": [], "solutions": 0, "noeuds": 0, "octets": 0}
+    elif etat["faites"]:
+        afficher(f"Reprise : {len(etat['faites'])}/{len(liste)} taches deja faites, {etat['solutions']} solutions")
+    faites = set(etat["faites"])
+
+    debut = time.perf_counter()
+    mode = "r+" if os.path.exists(sortie) else "w"
+    with open(sortie, mode) as flux, ProcessPoolExecutor(max_workers=nb_processus or os.cpu_count()) as executeur:
+        flux.truncate(etat["octets"])
+        flux.seek(etat["octets"])
+        en_cours = {executeur.submit(resoudre_tache, nom_jeu, nom_plateau, impose): numero
+                    for numero, impose in enumerate(liste) if numero not in faites}
+        for termine in as_completed(en_cours):
+            solutions, noeuds = termine.result()
+            for solution in solutions:
+                flux.write(solution + "\n")
+            flux.flush()
+            os.fsync(flux.fileno())
+            etat["faites"].append(en_cours[termine])
+            etat["solutions"] += len(solutions)
+            etat["noeuds"] += noeuds
+            etat["octets"] = flux.tell()
+            ecrire_reprise(fichier_reprise, etat)
+            duree = time.perf_counter() - debut
+            afficher(f"{len(etat['faites'])}/{len(liste)} taches, {etat['solutions']} solutions ({duree:.1f}s)")
+    return etat
+
+
+if __name__ == "__main__":
+    # python enumeration.py [plateau] [--jeu nom] [--sortie fichier] [--processus n] [--profondeur n]
+    arguments = sys.argv[1:]
+    options = {"--jeu": "pentominos", "--sortie": None, "--processus": None, "--profondeur": str(PROFONDEUR_DECOUPAGE)}
+    for option in options:
+        if option in arguments:
+            position = arguments.index(option)
+            options[option] = arguments[position + 1]
+            del arguments[position:position + 2]
+    nom_plateau = arguments[0] if arguments else "6x10"
+    sortie = options["--sortie"] or f"solutions_{nom_plateau}.txt"
+
+    debut = time.perf_counter()
+    etat = enumerer(options["--jeu"], nom_plateau, sortie,
+                    int(options["--processus"]) if options["--processus"] else None, int(options["--profondeur"]))
+    print(f"Total : {etat['solutions']} solutions, {etat['noeuds']} noeuds, ecrites dans {sortie} "
+          f"({time.perf_counter() - debut:.1f}s)")
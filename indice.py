@@ -0,0 +1,97 @@
+import time
+from orientations import LIGNES
+from regions import geometrie
+from solvabilite import masque_pieces, placements_par_case, admissible, chercher
+from transposition import table_partagee
+
+# Temps de recherche pris sur chaque update, en secondes
+TRANCHE = 0.004
+# L'horloge n'est lue qu'une fois par paquet d'essais
+ESSAIS_PAR_LECTURE = 32
+# Pendant un enregistrement ou une relecture, chaque update fait ce nombre fixe d'essais :
+# la recherche se termine alors a la meme image quelle que soit la vitesse de la machine
+ESSAIS_PAR_IMAGE = 128
+TAILLE_CACHE = 4096
+
+def recherche(vides, pieces, colonnes, lignes=LIGNES, cache=None, progression=None):
+    # renvoie la liste des placements qui completent le plateau, ou None
+    geo = geometrie(colonnes, lignes)
+    if not admissible(vides, pieces, geo):
+        return None
+    solution = []
+    trouve = yield from chercher(vides, pieces, placements_par_case(colonnes, lignes), geo,
+                                 cache if cache is not None else table_partagee(), solution, progression)
+    return solution if trouve else None
+
+
+class Indice:
+    # Cherche une facon de finir le plateau sans jamais bloquer la boucle de jeu : update
+    # appelle `avancer`, qui fait progresser la recherche pendant au plus `tranche` secondes
+    # (ou d'un nombre fixe d'essais). Une nouvelle demande abandonne la recherche en cours.
+
+    def __init__(self, colonnes, lignes=LIGNES, tranche=TRANCHE, cache=None):
+        self.colonnes = colonnes
+        self.lignes = lignes
+        self.tranche = tranche
+        self.cache = cache if cache is not None else table_partagee()
+        self.resultats = {}
+        self.demande = None
+        self.recherche = None
+        self.progression = [0, 0]
+        self.termine = False
+        self.resultat = None
+
+    def demander(self, vides, pieces):
+        demande = (vides, masque_pieces(pieces))
+        if demande == self.demande:
+            return
+        self.demande = demande
+        self.progression = [0, 0]
+        if demande in self.resultats:
+            self.recherche = None
+            self.termine = True
+            self.resultat = self.resultats[demande]
+        else:
+            self.recherche = recherche(vides, demande[1], self.colonnes, self.lignes, self.cache, self.progression)
+            self.termine = False
+            self.resultat = None
+
+    def annuler(self):
+        self.demande = None
+        self.recherche = None
+        self.termine = False
+        self.resultat = None
+
+    def avancement(self):
+        # part des placements du premier niveau deja essayes, entre 0 et 1
+        faits, possibles = self.progression
+        return faits / possibles if possibles else 0.0
+
+    def avancer(self, essais=None):
+        if self.recherche is None:
+            return
+        # la verification en arriere-plan, qui partage la table, a pu conclure avant nous
+        if self.cache.get(self.demande[0], self.demande[1], self.colonnes, self.lignes) is False:
+            self.terminer(None)
+            return
+        try:
+            if essais is not None:
+                for _ in range(essais):
+                    next(self.recherche)
+                return
+            fin = time.perf_counter() + self.tranche
+            while True:
+                for _ in range(ESSAIS_PAR_LECTURE):
+                    next(self.recherche)
+                if time.perf_counter() >= fin:
+                    return
+        except StopIteration as arret:
+            self.terminer(arret.value)
+
+    def terminer(self, resultat):
+        if len(self.resultats) >= TAILLE_CACHE:
+            self.resultats.clear()
+        self.resultats[self.demande] = resultat
+        self.recherche = None
+        self.termine = True
+        self.resultat = resultat
@@ -0,0 +1,19 @@
+grand_chelem = [
+    [2, 3, 6, 11, 8, 4, 5, 10, 9, 1, 7, 12],
+    [2, 3, 7, 9, 8, 5, 6, 4, 10, 1, 12, 11],
+    [2, 4, 6, 7, 8, 1, 3, 9, 11, 5, 12, 10],
+    [3, 4, 6, 7, 8, 1, 5, 2, 11, 10, 12, 9],
+    [3, 6, 7, 9, 10, 2, 12, 11, 4, 1, 5, 8],
+    [2, 3, 5, 6, 4, 9, 11, 10, 8, 12, 1, 7],
+    [2, 3, 5, 7, 8, 1, 9, 10, 12, 4, 11, 6],
+    [2, 3, 6, 10, 11, 8, 9, 12, 4, 1, 7, 5],
+    [2, 3, 6, 8, 5, 11, 9, 7, 12, 10, 1, 4],
+    [2, 4, 5, 8, 7, 10, 6, 1, 12, 9, 11, 3],
+    [3, 4, 5, 10, 9, 1, 6, 11, 8, 12, 7, 2],
+    [2, 6, 7, 9, 11, 3, 8, 4, 5, 10, 12, 1]
+]
+
+def pieces_etape(serie, etape):
+    return [numero - 1 for numero in grand_chelem[serie][:etape]]
+
+noms_series = "ABCDEFGHIJKL"
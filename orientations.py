@@ -0,0 +1,18 @@
+from bibliotheque import jeu, tables_rectangle
+
+LIGNES = 5
+
+# Tables du jeu classique, compilees depuis l'entree "pentominos" de formes.json
+JEU = jeu()
+
+def rectangle(colonnes, lignes=LIGNES):
+    return tables_rectangle(colonnes, lignes)
+
+def masque(index_piece, orientation, x, y, colonnes):
+    return rectangle(colonnes).masque(index_piece, orientation, x, y)
+
+def cases(index_piece, orientation, x, y):
+    return [[x + dx, y + dy] for dx, dy in JEU.orientations[index_piece][orientation]]
+
+def placements(index_piece, colonnes, lignes=LIGNES):
+    return rectangle(colonnes, lignes).placements[index_piece]
@@ -0,0 +1,79 @@
+import math
+import random
+from array import array
+import pyxel
+
+# Nombre maximal de pieces affichees en meme temps dans les cascades
+budget_particules = 256
+NB_DIRECTIONS = 64
+
+# Vecteurs unitaires precalcules pour des angles regulierement repartis entre 0 et pi
+directions_x = array("f", [math.cos(math.pi * k / (NB_DIRECTIONS - 1)) for k in range(NB_DIRECTIONS)])
+directions_y = array("f", [math.sin(math.pi * k / (NB_DIRECTIONS - 1)) for k in range(NB_DIRECTIONS)])
+
+def direction(angle_min, angle_max):
+    # indice d'une direction tiree au hasard entre angle_min et angle_max (radians, dans [0, pi])
+    k_min = round(angle_min / math.pi * (NB_DIRECTIONS - 1))
+    k_max = round(angle_max / math.pi * (NB_DIRECTIONS - 1))
+    return random.randint(k_min, k_max)
+
+
+class Particules:
+    # Pool de taille fixe stocke en tableaux paralleles : les particules actives occupent
+    # les indices 0..nb-1, et une particule morte est remplacee par la derniere (O(1)).
+
+    def __init__(self, capacite=None, limites=(-32, -32, 12 * 32, 10 * 32)):
+        if capacite is None:
+            capacite = budget_particules
+        self.capacite = capacite
+        self.nb = 0
+        self.x = array("f", bytes(4 * capacite))
+        self.y = array("f", bytes(4 * capacite))
+        self.dx = array("f", bytes(4 * capacite))
+        self.dy = array("f", bytes(4 * capacite))
+        self.image = array("H", bytes(2 * capacite))
+        self.x_min, self.y_min, self.x_max, self.y_max = limites
+
+    def emettre(self, x, y, dx, dy, image):
+        if self.nb == self.capacite:
+            return False
+        i = self.nb
+        self.x[i] = x
+        self.y[i] = y
+        self.dx[i] = dx
+        self.dy[i] = dy
+        self.image[i] = image
+        self.nb += 1
+        return True
+
+    def emettre_direction(self, x, y, indice_direction, vitesse, image, sens_y=-1):
+        return self.emettre(x, y, vitesse * directions_x[indice_direction],
+                            sens_y * vitesse * directions_y[indice_direction], image)
+
+    def retirer(self, i):
+        dernier = self.nb - 1
+        self.x[i] = self.x[dernier]
+        self.y[i] = self.y[dernier]
+        self.dx[i] = self.dx[dernier]
+        self.dy[i] = self.dy[dernier]
+        self.image[i] = self.image[dernier]
+        self.nb = dernier
+
+    def deplacer(self):
+        x, y, dx, dy = self.x, self.y, self.dx, self.dy
+        x_min, y_min, x_max, y_max = self.x_min, self.y_min, self.x_max, self.y_max
+        i = 0
+        while i < self.nb:
+            nx = x[i] + dx[i]
+            ny = y[i] + dy[i]
+            if ny < y_min or ny > y_max or nx < x_min or nx > x_max:
+                self.retirer(i)
+                continue
+            x[i] = nx
+            y[i] = ny
+            i += 1
+
+    def dessiner(self):
+        x, y, image = self.x, self.y, self.image
+        for i in range(self.nb):
+            pyxel.blt(x[i], y[i], 0, image[i], 16, 16, 16, 0, scale=2.0)
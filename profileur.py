@@ -0,0 +1,110 @@
+import csv
+import time
+import atexit
+from collections import deque
+import pyxel
+
+# Nombre d'images gardees pour les percentiles glissants et pour l'export CSV
+FENETRE = 300
+HISTORIQUE = 30 * 60 * 10
+FICHIER_CSV = "profil_images.csv"
+
+
+class _SectionInactive:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_section_inactive = _SectionInactive()
+
+
+class _Section:
+    def __init__(self, profileur, nom):
+        self.profileur = profileur
+        self.nom = nom
+
+    def __enter__(self):
+        self.debut = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        sections = self.profileur.sections
+        sections[self.nom] = sections.get(self.nom, 0) + time.perf_counter_ns() - self.debut
+        return False
+
+
+class Profileur:
+    # Temps de update et draw de chaque image, et detail par section. Inactif, une section
+    # ne coute qu'un appel qui renvoie un contexte vide partage.
+
+    def __init__(self, fenetre=FENETRE, historique=HISTORIQUE, fichier_csv=FICHIER_CSV):
+        self.actif = False
+        self.fichier_csv = fichier_csv
+        self.sections = {}
+        self.noms_sections = []
+        self.derniere_image = None
+        self.zone = None
+        self.totaux = deque(maxlen=fenetre)
+        self.images = deque(maxlen=historique)
+        self.numero_image = 0
+        self.export_prevu = False
+
+    def basculer(self):
+        self.actif = not self.actif
+        if self.actif and not self.export_prevu:
+            atexit.register(self.exporter_csv)
+            self.export_prevu = True
+
+    def section(self, nom):
+        if not self.actif:
+            return _section_inactive
+        return _Section(self, nom)
+
+    def enregistrer(self, scene, duree_update, duree_draw):
+        for nom in self.sections:
+            if nom not in self.noms_sections:
+                self.noms_sections.append(nom)
+        self.derniere_image = (self.numero_image, scene, duree_update, duree_draw, self.sections)
+        self.images.append(self.derniere_image)
+        self.totaux.append(duree_update + duree_draw)
+        self.numero_image += 1
+        self.sections = {}
+
+    def percentile(self, p):
+        if not self.totaux:
+            return 0
+        totaux = sorted(self.totaux)
+        return totaux[min(len(totaux) - 1, int(p / 100 * len(totaux)))]
+
+    def dessiner(self):
+        if self.derniere_image is None:
+            return
+        _, scene, duree_update, duree_draw, sections = self.derniere_image
+        lignes = [
+            scene,
+            f"update {duree_update / 1e6:6.2f} ms",
+            f"draw   {duree_draw / 1e6:6.2f} ms",
+            f"p95 {self.percentile(95) / 1e6:5.2f}  p99 {self.percentile(99) / 1e6:5.2f} ms",
+        ]
+        lignes += [f" {nom:<9}{duree / 1e6:6.2f} ms" for nom, duree in sections.items()]
+        hauteur = 7 * len(lignes) + 4
+        self.zone = (0, 0, 112, hauteur)
+        pyxel.rect(0, 0, 112, hauteur, 0)
+        for numero, ligne in enumerate(lignes):
+            pyxel.text(2, 2 + 7 * numero, ligne, 7)
+
+    def exporter_csv(self, fichier=None):
+        if not self.images:
+            return
+        fichier = fichier or self.fichier_csv
+        with open(fichier, "w", newline="") as f:
+            ecrivain = csv.writer(f)
+            ecrivain.writerow(["image", "scene", "update_ms", "draw_ms"] + [f"{nom}_ms" for nom in self.noms_sections])
+            for numero, scene, duree_update, duree_draw, sections in self.images:
+                ecrivain.writerow([numero, scene, f"{duree_update / 1e6:.3f}", f"{duree_draw / 1e6:.3f}"]
+                                  + [f"{sections.get(nom, 0) / 1e6:.3f}" for nom in self.noms_sections])
+
+
+profileur = Profileur()
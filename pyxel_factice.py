@@ -0,0 +1,50 @@
+import sys
+import types
+
+
+class ImageFactice:
+    def __init__(self, largeur, hauteur):
+        self.width = largeur
+        self.height = hauteur
+
+    def __getattr__(self, nom):
+        return lambda *args, **kwargs: None
+
+
+class PyxelFactice(types.ModuleType):
+    # Remplace pyxel : toutes les fonctions de dessin et de son ne font rien, et les
+    # touches enfoncees sont celles de l'ensemble `touches`.
+
+    def __init__(self):
+        super().__init__("pyxel")
+        self.touches = set()
+        self.codes = {}
+        self.frame_count = 0
+        self.width = 12 * 32
+        self.height = 10 * 32
+        self.mouse_x = 0
+        self.mouse_y = 0
+        self.Image = ImageFactice
+        self.musics = []
+
+    def __getattr__(self, nom):
+        if nom.startswith("KEY_") or nom.startswith("MOUSE_"):
+            return self.codes.setdefault(nom, len(self.codes) + 1)
+        return lambda *args, **kwargs: None
+
+    def btn(self, touche, *args, **kwargs):
+        return touche in self.touches
+
+    btnp = btn
+    btnr = btn
+
+    def appuyer(self, nom):
+        self.touches.clear()
+        if nom is not None:
+            self.touches.add(getattr(self, nom))
+
+
+def installer_pyxel_factice():
+    pyxel = PyxelFactice()
+    sys.modules["pyxel"] = pyxel
+    return pyxel
@@ -0,0 +1,128 @@
+from orientations import LIGNES
+
+class Geometrie:
+    # Masques de bords d'un plateau lignes x colonnes pour les calculs de voisinage sur bits.
+
+    def __init__(self, colonnes, lignes=LIGNES):
+        self.colonnes = colonnes
+        self.lignes = lignes
+        self.plein = (1 << (lignes * colonnes)) - 1
+        premiere_colonne = 0
+        derniere_colonne = 0
+        for x in range(lignes):
+            premiere_colonne |= 1 << (x * colonnes)
+            derniere_colonne |= 1 << (x * colonnes + colonnes - 1)
+        self.sans_premiere_colonne = self.plein & ~premiere_colonne
+        self.sans_derniere_colonne = self.plein & ~derniere_colonne
+        self.masque_ligne = (1 << colonnes) - 1
+        self.masques_colonnes = [sum(1 << (x * colonnes + y) for x in range(lignes)) for y in range(colonnes)]
+        self.lignes_inversees = [int(format(ligne, f"0{colonnes}b")[::-1], 2) for ligne in range(1 << colonnes)]
+
+    def symetriques(self, masque):
+        # images du masque par le miroir gauche/droite, le miroir haut/bas et le demi-tour
+        colonnes, lignes = self.colonnes, self.lignes
+        miroir_y = miroir_x = demi_tour = 0
+        for x in range(lignes):
+            ligne = (masque >> (x * colonnes)) & self.masque_ligne
+            inversee = self.lignes_inversees[ligne]
+            miroir_y |= inversee << (x * colonnes)
+            miroir_x |= ligne << ((lignes - 1 - x) * colonnes)
+            demi_tour |= inversee << ((lignes - 1 - x) * colonnes)
+        return miroir_y, miroir_x, demi_tour
+
+    def canonique(self, masque):
+        return min(masque, *self.symetriques(masque))
+
+    def premiere_case(self, vides):
+        # premiere case vide en parcourant le plateau colonne par colonne : sur un plateau de
+        # 5 lignes, remplir par le petit cote coupe l'arbre de recherche bien plus tot
+        for masque_colonne in self.masques_colonnes:
+            colonne = vides & masque_colonne
+            if colonne:
+                return (colonne & -colonne).bit_length() - 1
+        return -1
+
+    def voisins(self, masque):
+        colonnes = self.colonnes
+        return (((masque << 1) & self.sans_premiere_colonne)
+                | ((masque >> 1) & self.sans_derniere_colonne)
+                | (masque << colonnes)
+                | (masque >> colonnes)) & self.plein
+
+    def remplir(self, depart, zone):
+        region = depart & zone
+        while True:
+            etendue = (region | self.voisins(region)) & zone
+            if etendue == region:
+                return region
+            region = etendue
+
+    def regions(self, zone):
+        regions = []
+        while zone:
+            region = self.remplir(zone & -zone, zone)
+            regions.append(region)
+            zone &= ~region
+        return regions
+
+    def zone_morte_autour(self, vides, masque):
+        # Apres avoir occupe `masque`, seules les regions qui le bordent ont pu etre coupees.
+        reste = self.voisins(masque) & vides
+        while reste:
+            region = self.remplir(reste & -reste, vides)
+            if bin(region).count("1") % 5 != 0:
+                return True
+            reste &= ~region
+        return False
+
+
+_geometries = {}
+
+def geometrie(colonnes, lignes=LIGNES):
+    cle = (colonnes, lignes)
+    if cle not in _geometries:
+        _geometries[cle] = Geometrie(colonnes, lignes)
+    return _geometries[cle]
+
+
+class SuiviRegions:
+    # Composantes connexes des cases vides, tenues a jour a chaque changement d'occupation :
+    # seules les regions touchees par les cases modifiees sont recalculees.
+
+    def __init__(self, colonnes, lignes=LIGNES, occupe=0):
+        self.geometrie = geometrie(colonnes, lignes)
+        self.vides = self.geometrie.plein & ~occupe
+        self.liste = self.geometrie.regions(self.vides)
+
+    def occuper(self, masque):
+        masque &= self.vides
+        if not masque:
+            return
+        self.vides &= ~masque
+        touchees = [region for region in self.liste if region & masque]
+        self.liste = [region for region in self.liste if not region & masque]
+        for region in touchees:
+            self.liste.extend(self.geometrie.regions(region & ~masque))
+
+    def liberer(self, masque):
+        masque &= ~self.vides & self.geometrie.plein
+        if not masque:
+            return
+        self.vides |= masque
+        bord = self.geometrie.voisins(masque)
+        zone = masque
+        restantes = []
+        for region in self.liste:
+            if region & bord:
+                zone |= region
+            else:
+                restantes.append(region)
+        self.liste = restantes + self.geometrie.regions(zone)
+
+    def mettre_a_jour(self, occupe):
+        nouveaux_vides = self.geometrie.plein & ~occupe
+        self.occuper(self.vides & ~nouveaux_vides)
+        self.liberer(nouveaux_vides & ~self.vides)
+
+    def position_morte(self):
+        return any(bin(region).count("1") % 5 != 0 for region in self.liste)
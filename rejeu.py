@@ -0,0 +1,44 @@
+import sys
+import time
+import random
+import shutil
+import tempfile
+from pyxel_factice import installer_pyxel_factice
+
+def rejouer(fichier, dessiner=False, images_max=None, afficher=print):
+    # Relecture sans fenetre et aussi vite que possible, dans un processus ou pyxel n'a pas
+    # encore ete importe. Les sauvegardes sont celles copiees dans l'enregistrement, lues et
+    # ecrites dans un dossier temporaire.
+    pyxel = installer_pyxel_factice()
+    import sauvegarde
+    import Pythominos
+    from enregistrement import Lecteur
+
+    lecteur = Lecteur(fichier)
+    dossier = tempfile.mkdtemp()
+    lecteur.restaurer_sauvegardes(dossier)
+    sauvegardes = sauvegarde.changer_dossier(dossier)
+
+    random.seed(lecteur.graine)
+    scenes = Pythominos.scenes
+    scenes.entrees = lecteur
+    scenes.vider(Pythominos.MainMenu())
+    debut = time.perf_counter()
+    nb_images = 0
+    while not lecteur.termine and (images_max is None or nb_images < images_max):
+        pyxel.frame_count = nb_images
+        scenes.update()
+        if dessiner:
+            scenes.draw()
+        nb_images += 1
+    duree = time.perf_counter() - debut
+    lecteur.fermer()
+    sauvegardes.attendre()
+    shutil.rmtree(dossier, ignore_errors=True)
+    afficher(f"{nb_images} images rejouees en {duree:.2f}s ({nb_images / max(duree, 1e-9):.0f} images/s), "
+             f"ecran final : {type(scenes.scene()).__name__}")
+    return scenes
+
+if __name__ == "__main__":
+    # python rejeu.py fichier [--dessiner]
+    rejouer(sys.argv[1], dessiner="--dessiner" in sys.argv[2:])
@@ -0,0 +1,51 @@
+import pyxel
+
+TAILLE_TUILE = 32
+
+
+class RenduTuiles:
+    # L'ecran est decoupe en tuiles ; le contenu statique est compose une fois dans une image
+    # cache, et seules les tuiles marquees sales sont recopiees depuis le cache puis redessinees.
+    # pyxel n'efface pas l'ecran entre deux images, le reste garde donc son contenu.
+
+    def __init__(self, largeur, hauteur, taille=TAILLE_TUILE):
+        self.taille = taille
+        self.colonnes = (largeur + taille - 1) // taille
+        self.lignes = (hauteur + taille - 1) // taille
+        self.fond = pyxel.Image(largeur, hauteur)
+        self.sales = set()
+        self.complet = True
+
+    def composer(self, dessiner_fond):
+        dessiner_fond(self.fond)
+        self.invalider()
+
+    def invalider(self):
+        self.complet = True
+
+    def marquer(self, colonne, ligne):
+        self.sales.add((colonne, ligne))
+
+    def marquer_zone(self, x, y, largeur, hauteur):
+        taille = self.taille
+        colonne_min = max(0, int(x) // taille)
+        ligne_min = max(0, int(y) // taille)
+        colonne_max = min(self.colonnes - 1, int(x + largeur - 1) // taille)
+        ligne_max = min(self.lignes - 1, int(y + hauteur - 1) // taille)
+        for ligne in range(ligne_min, ligne_max + 1):
+            for colonne in range(colonne_min, colonne_max + 1):
+                self.sales.add((colonne, ligne))
+
+    def tuiles_a_redessiner(self):
+        # vide la liste des tuiles sales en recopiant leur fond, et la renvoie
+        if self.complet:
+            self.complet = False
+            self.sales.clear()
+            pyxel.blt(0, 0, self.fond, 0, 0, self.fond.width, self.fond.height)
+            return [(colonne, ligne) for ligne in range(self.lignes) for colonne in range(self.colonnes)]
+        taille = self.taille
+        sales = sorted(self.sales, key=lambda tuile: (tuile[1], tuile[0]))
+        self.sales.clear()
+        for colonne, ligne in sales:
+            pyxel.blt(colonne * taille, ligne * taille, self.fond, colonne * taille, ligne * taille, taille, taille)
+        return sales
@@ -1,24 +1,259 @@
-import json
-
-def save_game_file(mode_grand_chelem, niveau_grand_chelem, pieces_selectionnees, plateau, etape, filename="katamino_save.json"):
-    game_data = {
-        "mode_grand_chelem": mode_grand_chelem,
-        "niveau_grand_chelem": niveau_grand_chelem,
-        "pieces_selectionnees": pieces_selectionnees,
-        "plateau": plateau,
-        "etape": etape 
-    }
-    with open(filename, 'w') as f:
-        json.dump(game_data, f)
-    print(f"Game saved to {filename}")
-    return True
-
-def load_game_file(filename="katamino_save.json"):
-    try:
-        with open(filename, 'r') as f:
-            game_data = json.load(f)
-        print(f"Game loaded from {filename}")
-        return game_data
-    except Exception as e:
-        print(f"Failed to load game: {e}")
-        return None
\ No newline at end of file
+import os
+import json
+import time
+import zlib
+import struct
+import threading
+import orientations
+
+DOSSIER_SAUVEGARDES = "../saves"
+ANCIENNE_SAUVEGARDE = "katamino_save.json"
+FICHIER_INDEX = "index.json"
+ENTETE = b"PYSV"
+VERSION = 1
+NB_EMPLACEMENTS = 4
+# l'emplacement 0 est reserve a la sauvegarde automatique
+EMPLACEMENT_AUTO = 0
+EMPLACEMENT_MANUEL = 1
+
+# Version 1 : mode, serie, etape, colonnes, lignes, occupation du plateau (bit x * colonnes + y),
+# puis les pieces choisies (un octet chacune) et les pieces posees (piece, orientation, x, y),
+# le tout suivi d'un crc32.
+DEBUT_V1 = struct.Struct("<BBBBBQ")
+PLACEMENT_V1 = struct.Struct("<BBbb")
+CRC = struct.Struct("<I")
+
+
+def placements_depuis_plateau(plateau):
+    # retrouve la position de chaque piece d'un plateau de numeros ; None si une piece ne correspond a aucun placement
+    lignes = len(plateau)
+    colonnes = len(plateau[0]) if lignes > 0 else 0
+    cases_par_piece = {}
+    for x in range(lignes):
+        for y in range(colonnes):
+            if plateau[x][y] != 0:
+                cases_par_piece.setdefault(plateau[x][y], []).append(x * colonnes + y)
+    resultat = []
+    for numero, cases in sorted(cases_par_piece.items()):
+        cases = tuple(cases)
+        trouve = next((p for p in orientations.placements(numero - 1, colonnes, lignes) if tuple(sorted(p.cases)) == cases), None)
+        if trouve is None:
+            return None
+        resultat.append((trouve.piece, trouve.orientation, trouve.x, trouve.y))
+    return resultat
+
+def plateau_depuis_placements(placements, colonnes, lignes=orientations.LIGNES):
+    plateau = [[0 for _ in range(colonnes)] for _ in range(lignes)]
+    for piece, orientation, x, y in placements:
+        for cx, cy in orientations.cases(piece, orientation, x, y):
+            plateau[cx][cy] = piece + 1
+    return plateau
+
+def occupation(placements, colonnes):
+    masque = 0
+    for piece, orientation, x, y in placements:
+        masque |= orientations.masque(piece, orientation, x, y, colonnes)
+    return masque
+
+
+def encoder(donnees):
+    placements = donnees.get("placements")
+    if placements is None:
+        placements = placements_depuis_plateau(donnees["plateau"])
+        if placements is None:
+            raise ValueError("plateau sans placement de pieces valide")
+    pieces = donnees["pieces_selectionnees"]
+    colonnes = donnees.get("colonnes", len(pieces))
+    lignes = donnees.get("lignes", orientations.LIGNES)
+    corps = bytearray(DEBUT_V1.pack(bool(donnees["mode_grand_chelem"]), donnees["niveau_grand_chelem"], donnees["etape"],
+                                    colonnes, lignes, occupation(placements, colonnes)))
+    corps.append(len(pieces))
+    corps += bytes(pieces)
+    corps.append(len(placements))
+    for placement in placements:
+        corps += PLACEMENT_V1.pack(*placement)
+    corps = ENTETE + bytes([VERSION]) + bytes(corps)
+    return corps + CRC.pack(zlib.crc32(corps))
+
+def decoder(octets):
+    if len(octets) < len(ENTETE) + 1 + CRC.size or not octets.startswith(ENTETE):
+        raise ValueError("fichier de sauvegarde inconnu")
+    corps, (crc,) = octets[:-CRC.size], CRC.unpack_from(octets, len(octets) - CRC.size)
+    if zlib.crc32(corps) != crc:
+        raise ValueError("sauvegarde corrompue")
+    version = corps[len(ENTETE)]
+    if version != VERSION:
+        raise ValueError(f"version de sauvegarde {version} non geree")
+
+    position = len(ENTETE) + 1
+    mode, niveau, etape, colonnes, lignes, occupe = DEBUT_V1.unpack_from(corps, position)
+    position += DEBUT_V1.size
+    nb_pieces = corps[position]
+    pieces = list(corps[position + 1:position + 1 + nb_pieces])
+    position += 1 + nb_pieces
+    nb_placements = corps[position]
+    position += 1
+    placements = [PLACEMENT_V1.unpack_from(corps, position + i * PLACEMENT_V1.size) for i in range(nb_placements)]
+    if occupation(placements, colonnes) != occupe:
+        raise ValueError("placements incoherents avec le plateau")
+    return {
+        "mode_grand_chelem": bool(mode),
+        "niveau_grand_chelem": niveau,
+        "pieces_selectionnees": pieces,
+        "plateau": plateau_depuis_placements(placements, colonnes, lignes),
+        "placements": placements,
+        "etape": etape,
+    }
+
+
+def ecrire_atomique(chemin, octets):
+    fichier_temporaire = chemin + ".tmp"
+    with open(fichier_temporaire, "wb") as f:
+        f.write(octets)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(fichier_temporaire, chemin)
+
+def load_game_file(filename=os.path.join(DOSSIER_SAUVEGARDES, ANCIENNE_SAUVEGARDE)):
+    # ancien format JSON, lu seulement pour la migration
+    try:
+        with open(filename, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class Emplacements:
+    # Un fichier binaire par emplacement et un petit index JSON qui resume chacun d'eux.
+
+    def __init__(self, dossier=DOSSIER_SAUVEGARDES):
+        self.dossier = dossier
+
+    def chemin(self, emplacement):
+        return os.path.join(self.dossier, f"emplacement_{emplacement}.pysv")
+
+    def lire_index(self):
+        try:
+            with open(os.path.join(self.dossier, FICHIER_INDEX)) as f:
+                return {int(emplacement): resume for emplacement, resume in json.load(f).items()}
+        except (OSError, ValueError):
+            return {}
+
+    def sauvegarder(self, emplacement, donnees):
+        octets = encoder(donnees)
+        os.makedirs(self.dossier, exist_ok=True)
+        ecrire_atomique(self.chemin(emplacement), octets)
+        index = self.lire_index()
+        index[emplacement] = {
+            "date": time.time(),
+            "mode_grand_chelem": bool(donnees["mode_grand_chelem"]),
+            "niveau_grand_chelem": donnees["niveau_grand_chelem"],
+            "etape": donnees["etape"],
+        }
+        ecrire_atomique(os.path.join(self.dossier, FICHIER_INDEX), json.dumps(index).encode())
+
+    def charger(self, emplacement):
+        try:
+            with open(self.chemin(emplacement), "rb") as f:
+                return decoder(f.read())
+        except (OSError, ValueError):
+            return None
+
+    def migrer(self):
+        # convertit l'ancienne sauvegarde JSON dans l'emplacement manuel, puis la renomme
+        ancienne = os.path.join(self.dossier, ANCIENNE_SAUVEGARDE)
+        donnees = load_game_file(ancienne)
+        if donnees is None:
+            return False
+        try:
+            self.sauvegarder(EMPLACEMENT_MANUEL, donnees)
+        except (KeyError, TypeError, ValueError, OSError):
+            return False
+        os.replace(ancienne, ancienne + ".migre")
+        return True
+
+    def plus_recent(self):
+        index = self.lire_index()
+        if not index and self.migrer():
+            index = self.lire_index()
+        for emplacement in sorted(index, key=lambda e: index[e]["date"], reverse=True):
+            donnees = self.charger(emplacement)
+            if donnees is not None:
+                return donnees
+        return None
+
+
+class Sauvegardeur:
+    # Ecrit les sauvegardes sur un thread a part : la boucle de jeu depose une copie de l'etat
+    # et continue ; si plusieurs demandes visent le meme emplacement, seule la derniere est ecrite.
+    # Chaque demande recoit un numero, que la boucle de jeu passe ensuite a `resultat`.
+
+    def __init__(self, emplacements=None):
+        self.emplacements = emplacements if emplacements is not None else Emplacements()
+        self.condition = threading.Condition()
+        self.demandes = {}
+        self.en_cours = False
+        self.numero = 0
+        # ecrites[emplacement] : (numero de la derniere demande traitee, erreur ou None)
+        self.ecrites = {}
+        self.thread = threading.Thread(target=self.boucle, daemon=True)
+        self.thread.start()
+
+    def demander(self, emplacement, donnees):
+        with self.condition:
+            self.numero += 1
+            self.demandes[emplacement] = (self.numero, donnees)
+            self.condition.notify_all()
+            return self.numero
+
+    def resultat(self, emplacement, numero):
+        # None tant que la demande n'est pas traitee, puis True si elle (ou une plus recente du
+        # meme emplacement) a ete ecrite, False si l'ecriture a echoue
+        with self.condition:
+            traitee, erreur = self.ecrites.get(emplacement, (0, None))
+            if traitee < numero:
+                return None
+            return erreur is None
+
+    def attendre(self):
+        with self.condition:
+            while self.demandes or self.en_cours:
+                self.condition.wait()
+
+    def boucle(self):
+        while True:
+            with self.condition:
+                while not self.demandes:
+                    self.condition.wait()
+                emplacement, (numero, donnees) = self.demandes.popitem()
+                self.en_cours = True
+            erreur = None
+            try:
+                self.emplacements.sauvegarder(emplacement, donnees)
+            except Exception as e:
+                # une donnee inattendue (struct.error, KeyError...) ne doit pas tuer le thread
+                erreur = e
+            finally:
+                # sinon `attendre` (et donc le chargement) bloquerait pour toujours
+                with self.condition:
+                    self.ecrites[emplacement] = (numero, erreur)
+                    self.en_cours = False
+                    self.condition.notify_all()
+
+    def charger_plus_recent(self):
+        self.attendre()
+        return self.emplacements.plus_recent()
+
+
+_sauvegardeur = None
+
+def sauvegardeur():
+    global _sauvegardeur
+    if _sauvegardeur is None:
+        _sauvegardeur = Sauvegardeur()
+    return _sauvegardeur
+
+def changer_dossier(dossier):
+    global _sauvegardeur
+    _sauvegardeur = Sauvegardeur(Emplacements(dossier))
+    return _sauvegardeur
@@ -0,0 +1,72 @@
+import time
+import pyxel
+from profileur import profileur
+from sons import sons
+
+class GestionnaireScenes:
+    # Une seule boucle pyxel.run pour tout le jeu : les ecrans sont empiles, depiles ou
+    # remplaces sans relancer pyxel.run, et les ressources ne sont chargees qu'une fois.
+
+    def __init__(self, fichier_ressources="ressources.pyxres"):
+        self.fichier_ressources = fichier_ressources
+        self.ressources_chargees = False
+        self.pile = []
+        self.nom_scene = ""
+        self.duree_update = 0
+        # enregistreur ou lecteur de touches, avance avant chaque image
+        self.entrees = None
+
+    def charger_ressources(self):
+        if not self.ressources_chargees:
+            pyxel.load(self.fichier_ressources)
+            self.ressources_chargees = True
+
+    def scene(self):
+        return self.pile[-1] if self.pile else None
+
+    def empiler(self, scene):
+        self.pile.append(scene)
+
+    def depiler(self):
+        self.pile.pop()
+        scene = self.scene()
+        if scene is not None and hasattr(scene, "reprendre"):
+            scene.reprendre()
+
+    def remplacer(self, scene):
+        if self.pile:
+            self.pile[-1] = scene
+        else:
+            self.pile.append(scene)
+
+    def vider(self, scene):
+        self.pile = [scene]
+
+    def update(self):
+        if self.entrees is not None:
+            self.entrees.image_suivante()
+        if pyxel.btnp(pyxel.KEY_F3):
+            profileur.basculer()
+        if not profileur.actif:
+            self.pile[-1].update()
+            sons.envoyer()
+            return
+        self.nom_scene = type(self.pile[-1]).__name__
+        debut = time.perf_counter_ns()
+        self.pile[-1].update()
+        sons.envoyer()
+        self.duree_update = time.perf_counter_ns() - debut
+
+    def draw(self):
+        if not profileur.actif:
+            self.pile[-1].draw()
+            return
+        debut = time.perf_counter_ns()
+        self.pile[-1].draw()
+        profileur.enregistrer(self.nom_scene, self.duree_update, time.perf_counter_ns() - debut)
+        profileur.dessiner()
+
+    def lancer(self, fabrique_scene):
+        self.charger_ressources()
+        self.vider(fabrique_scene())
+        pyxel.run(self.update, self.draw)
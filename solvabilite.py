@@ -0,0 +1,166 @@
+import threading
+from orientations import placements, LIGNES
+from regions import geometrie
+from transposition import table_partagee
+
+# Essais au plus par verification, soit quelques dizaines de millisecondes : au-dela le
+# verificateur renonce et le plateau reste "inconnu" jusqu'au coup suivant
+ESSAIS_MAX = 2000
+
+_index = {}
+
+def placements_par_case(colonnes, lignes=LIGNES):
+    # index[piece][case] : placements de la piece dont la premiere case, colonne par colonne
+    # comme Geometrie.premiere_case, est `case`
+    cle = (colonnes, lignes)
+    if cle not in _index:
+        index = []
+        for index_piece in range(12):
+            par_case = [[] for _ in range(lignes * colonnes)]
+            for placement in placements(index_piece, colonnes, lignes):
+                premiere = min(placement.cases, key=lambda case: (case % colonnes, case // colonnes))
+                par_case[premiere].append(placement)
+            index.append(par_case)
+        _index[cle] = index
+    return _index[cle]
+
+def masque_pieces(pieces):
+    masque = 0
+    for index_piece in pieces:
+        masque |= 1 << index_piece
+    return masque
+
+class Abandon(Exception):
+    pass
+
+def admissible(vides, pieces, geo):
+    # tests immediats : autant de cases que de carres de pieces, aucune region impossible
+    if bin(vides).count("1") != 5 * bin(pieces).count("1"):
+        return False
+    return not any(bin(region).count("1") % 5 != 0 for region in geo.regions(vides))
+
+def chercher(vides, pieces, index, geo, cache, solution=None, progression=None):
+    # Generateur : rend la main avant chaque essai de placement et renvoie True si le plateau
+    # peut etre complete. Chaque etat tranche va dans la table de transposition, commune a la
+    # verification et a l'indice. Si `solution` est une liste, elle recoit les placements
+    # d'une completion ; `progression` ([essais faits, essais possibles]) suit le premier niveau.
+    if vides == 0:
+        return True
+    connu = cache.get(vides, pieces, geo.colonnes, geo.lignes)
+    if connu is False or (connu and solution is None):
+        return connu
+
+    case = geo.premiere_case(vides)
+    if progression is not None:
+        progression[:] = [0, sum(len(index[i][case]) for i in range(len(index)) if pieces >> i & 1)]
+    reste = pieces
+    while reste:
+        bit = reste & -reste
+        reste ^= bit
+        for placement in index[bit.bit_length() - 1][case]:
+            if progression is not None:
+                progression[0] += 1
+            masque = placement.masque
+            if masque & vides != masque:
+                continue
+            reste_vides = vides ^ masque
+            if geo.zone_morte_autour(reste_vides, masque):
+                continue
+            yield
+            if solution is not None:
+                solution.append(placement)
+            if (yield from chercher(reste_vides, pieces ^ bit, index, geo, cache, solution)):
+                cache.put(vides, pieces, geo.colonnes, geo.lignes, True)
+                return True
+            if solution is not None:
+                solution.pop()
+
+    cache.put(vides, pieces, geo.colonnes, geo.lignes, False)
+    return False
+
+def completable(vides, pieces, colonnes, lignes=LIGNES, cache=None, abandon=None, essais_max=None):
+    # vides : masque des cases libres, pieces : masque des pieces encore a poser.
+    # `abandon`, s'il est donne, est consulte avant chaque essai : des qu'il renvoie True la
+    # recherche leve Abandon (les sous-plateaux deja tranches restent dans le cache).
+    # Renvoie None si la recherche n'a pas conclu en `essais_max` essais.
+    geo = geometrie(colonnes, lignes)
+    if not admissible(vides, pieces, geo):
+        return False
+    if cache is None:
+        cache = table_partagee()
+    recherche = chercher(vides, pieces, placements_par_case(colonnes, lignes), geo, cache)
+    essais = 0
+    try:
+        while True:
+            next(recherche)
+            if abandon is not None and abandon():
+                raise Abandon
+            essais += 1
+            if essais_max is not None and essais >= essais_max:
+                return None
+    except StopIteration as arret:
+        return arret.value
+
+
+class VerificateurSolvabilite:
+    # Calcule en arriere-plan si le plateau en cours peut encore etre complete :
+    # la boucle de jeu depose une demande et lit `resultat` sans jamais attendre.
+    # Chaque nouvelle demande incremente `generation`, ce qui interrompt la recherche en cours.
+    # `resultat` vaut None tant que `en_cours` est vrai, et reste None si la recherche a depasse
+    # son budget d'essais.
+
+    def __init__(self, colonnes, lignes=LIGNES, cache=None, essais_max=ESSAIS_MAX):
+        self.colonnes = colonnes
+        self.lignes = lignes
+        self.cache = cache if cache is not None else table_partagee()
+        self.essais_max = essais_max
+        self.condition = threading.Condition()
+        self.demande = None
+        self.derniere_demande = None
+        self.generation = 0
+        self.resultat = None
+        self.en_cours = False
+        self.thread = threading.Thread(target=self.boucle, daemon=True)
+        self.thread.start()
+
+    def demander(self, vides, pieces):
+        demande = (vides, masque_pieces(pieces))
+        with self.condition:
+            if demande == self.derniere_demande:
+                return
+            self.derniere_demande = demande
+            self.generation += 1
+            connu = self.cache.get(vides, demande[1], self.colonnes, self.lignes)
+            self.resultat = connu
+            self.en_cours = connu is None
+            if connu is None:
+                self.demande = demande
+                self.condition.notify()
+
+    def boucle(self):
+        while True:
+            with self.condition:
+                while self.demande is None:
+                    self.condition.wait()
+                demande = self.demande
+                self.demande = None
+                generation = self.generation
+            vides, pieces = demande
+            try:
+                resultat = completable(vides, pieces, self.colonnes, self.lignes, self.cache,
+                                       lambda: self.generation != generation, self.essais_max)
+            except Abandon:
+                continue
+            with self.condition:
+                if demande == self.derniere_demande:
+                    self.resultat = resultat
+                    self.en_cours = False
+
+
+_verificateurs = {}
+
+def verificateur(colonnes, lignes=LIGNES):
+    cle = (colonnes, lignes)
+    if cle not in _verificateurs:
+        _verificateurs[cle] = VerificateurSolvabilite(colonnes, lignes)
+    return _verificateurs[cle]
@@ -0,0 +1,298 @@
+import sys
+import time
+from orientations import rectangle
+from regions import geometrie
+
+LIGNES = 5
+
+class DancingLinks:
+    # Algorithm X de Knuth sur des listes doublement chainees stockees dans des tableaux :
+    # le noeud 0 est la racine, les noeuds 1..nb_colonnes sont les en-tetes de colonnes.
+    # Avec `geo`, `vides` (cases a couvrir) et `masques` (cases de chaque ligne), une ligne qui
+    # laisse autour d'elle une region vide dont la taille n'est pas un multiple de 5 n'est pas
+    # essayee : la colonne la plus contrainte ne repere que les regions de moins de 5 cases.
+
+    def __init__(self, nb_colonnes, lignes, geo=None, vides=0, masques=None):
+        n = nb_colonnes + 1
+        self.G = [i - 1 for i in range(n)]
+        self.D = [i + 1 for i in range(n)]
+        self.G[0] = nb_colonnes
+        self.D[nb_colonnes] = 0
+        self.H = list(range(n))
+        self.B = list(range(n))
+        self.C = list(range(n))
+        self.taille = [0] * n
+        self.ligne = [-1] * n
+        self.noeuds = 0
+        self.geo = geo
+        self.vides = vides
+        self.masques = masques
+
+        for numero_ligne, colonnes in enumerate(lignes):
+            premier = None
+            for c in colonnes:
+                self.ajouter_noeud(c + 1, numero_ligne)
+                x = len(self.C) - 1
+                if premier is None:
+                    premier = x
+                    self.G[x] = x
+                    self.D[x] = x
+                else:
+                    self.G[x] = self.G[premier]
+                    self.D[x] = premier
+                    self.D[self.G[premier]] = x
+                    self.G[premier] = x
+
+    def ajouter_noeud(self, c, numero_ligne):
+        x = len(self.C)
+        self.G.append(x)
+        self.D.append(x)
+        self.H.append(self.H[c])
+        self.B.append(c)
+        self.C.append(c)
+        self.ligne.append(numero_ligne)
+        self.B[self.H[c]] = x
+        self.H[c] = x
+        self.taille[c] += 1
+
+    def couvrir(self, c):
+        G, D, H, B, C, taille = self.G, self.D, self.H, self.B, self.C, self.taille
+        D[G[c]] = D[c]
+        G[D[c]] = G[c]
+        i = B[c]
+        while i != c:
+            j = D[i]
+            while j != i:
+                B[H[j]] = B[j]
+                H[B[j]] = H[j]
+                taille[C[j]] -= 1
+                j = D[j]
+            i = B[i]
+
+    def decouvrir(self, c):
+        G, D, H, B, C, taille = self.G, self.D, self.H, self.B, self.C, self.taille
+        i = H[c]
+        while i != c:
+            j = G[i]
+            while j != i:
+                taille[C[j]] += 1
+                B[H[j]] = j
+                H[B[j]] = j
+                j = G[j]
+            i = H[i]
+        D[G[c]] = c
+        G[D[c]] = c
+
+    def solutions(self):
+        return self.chercher([])
+
+    def branchement(self):
+        # nombre de choix possibles pour la colonne la plus contrainte, avant tout placement
+        if self.D[0] == 0:
+            return 0
+        return min(self.taille[c] for c in self.colonnes_actives())
+
+    def colonnes_actives(self):
+        c = self.D[0]
+        while c != 0:
+            yield c
+            c = self.D[c]
+
+    def chercher(self, choix):
+        D, B, C, taille = self.D, self.B, self.C, self.taille
+        if D[0] == 0:
+            yield list(choix)
+            return
+
+        colonne = D[0]
+        minimum = taille[colonne]
+        c = D[colonne]
+        while c != 0 and minimum > 0:
+            if taille[c] < minimum:
+                colonne = c
+                minimum = taille[c]
+            c = D[c]
+        if minimum == 0:
+            return
+
+        self.couvrir(colonne)
+        r = B[colonne]
+        while r != colonne:
+            if self.geo is not None:
+                masque = self.masques[self.ligne[r]]
+                if self.geo.zone_morte_autour(self.vides ^ masque, masque):
+                    r = B[r]
+                    continue
+                self.vides ^= masque
+            self.noeuds += 1
+            choix.append(self.ligne[r])
+            j = D[r]
+            while j != r:
+                self.couvrir(C[j])
+                j = D[j]
+
+            yield from self.chercher(choix)
+
+            j = self.G[r]
+            while j != r:
+                self.decouvrir(C[j])
+                j = self.G[j]
+            choix.pop()
+            if self.geo is not None:
+                self.vides ^= self.masques[self.ligne[r]]
+            r = B[r]
+        self.decouvrir(colonne)
+
+
+class Probleme:
+    # Couverture exacte du plateau de `tables` par les pieces donnees (indices dans le jeu,
+    # toutes par defaut) : une colonne par case jouable puis une par piece.
+
+    def __init__(self, tables, pieces=None, placements_autorises=None):
+        self.tables = tables
+        self.pieces = list(range(len(tables.jeu.formes))) if pieces is None else list(pieces)
+        self.colonnes = tables.plateau.colonnes
+        self.lignes = tables.plateau.lignes
+        cases = sorted(x * self.colonnes + y for x, y in tables.plateau.cases)
+        self.nb_cases = len(cases)
+        colonne_case = {case: numero for numero, case in enumerate(cases)}
+        self.rangees = []
+        self.placements = []
+        for k, index_piece in enumerate(self.pieces):
+            if placements_autorises is not None and index_piece in placements_autorises:
+                candidats = placements_autorises[index_piece]
+            else:
+                candidats = tables.placements[index_piece]
+            for placement in candidats:
+                self.rangees.append([colonne_case[case] for case in placement.cases] + [self.nb_cases + k])
+                self.placements.append(placement)
+
+    def est_pavable(self):
+        return self.nb_cases == sum(len(self.tables.jeu.formes[index_piece]) for index_piece in self.pieces)
+
+    def moteur(self, elaguer=True):
+        # l'elagage par regions ne vaut que si toutes les pieces ont 5 cases
+        if not elaguer or any(len(self.tables.jeu.formes[index_piece]) != 5 for index_piece in self.pieces):
+            return DancingLinks(self.nb_cases + len(self.pieces), self.rangees)
+        vides = sum(1 << (x * self.colonnes + y) for x, y in self.tables.plateau.cases)
+        return DancingLinks(self.nb_cases + len(self.pieces), self.rangees, geometrie(self.colonnes, self.lignes),
+                            vides, [placement.masque for placement in self.placements])
+
+    def vers_plateau(self, choix):
+        plateau = self.tables.grille()
+        for numero_rangee in choix:
+            placement = self.placements[numero_rangee]
+            for case in placement.cases:
+                plateau[case // self.colonnes][case % self.colonnes] = placement.piece + 1
+        return plateau
+
+    def pavages(self):
+        # solutions, chacune donnee comme une liste de placements
+        if not self.est_pavable():
+            return
+        for choix in self.moteur().solutions():
+            yield [self.placements[numero_rangee] for numero_rangee in choix]
+
+    def solutions(self):
+        # solutions, chacune donnee comme un plateau de numeros de pieces
+        if not self.est_pavable():
+            return
+        for choix in self.moteur().solutions():
+            yield self.vers_plateau(choix)
+
+
+def enumerer_solutions(pieces, colonnes=None, lignes=LIGNES):
+    if colonnes is None:
+        colonnes = len(pieces)
+    return Probleme(rectangle(colonnes, lignes), pieces).solutions()
+
+def resoudre(pieces, colonnes=None, lignes=LIGNES):
+    for solution in enumerer_solutions(pieces, colonnes, lignes):
+        return solution
+    return None
+
+def permutations_symetries(colonnes, lignes=LIGNES):
+    # Symetries non triviales du rectangle : miroir gauche/droite, miroir haut/bas, demi-tour.
+    # Chacune est donnee comme une permutation des cases.
+    permutations = []
+    for miroir_x, miroir_y in ((False, True), (True, False), (True, True)):
+        permutations.append([(lignes - 1 - x if miroir_x else x) * colonnes + (colonnes - 1 - y if miroir_y else y)
+                             for x in range(lignes) for y in range(colonnes)])
+    return permutations
+
+def compter_solutions_distinctes(pieces, colonnes=None, lignes=LIGNES):
+    # Lemme de Burnside : distinctes = (toutes + fixes par chaque symetrie) / 4.
+    # Les pieces etant deux a deux differentes, une solution fixe n'utilise que des placements
+    # eux-memes invariants. Pour compter toutes les solutions, une piece pivot n'est placee
+    # qu'a un representant par orbite, pondere par la taille de l'orbite.
+    # Renvoie (nombre de solutions distinctes, noeuds explores).
+    if colonnes is None:
+        colonnes = len(pieces)
+    tables = rectangle(colonnes, lignes)
+    probleme = Probleme(tables, pieces)
+    if not probleme.est_pavable() or not pieces:
+        return 0, 0
+    permutations = permutations_symetries(colonnes, lignes)
+
+    pivot = min(pieces, key=lambda index_piece: len(tables.placements[index_piece]))
+    representants = {}
+    for placement in tables.placements[pivot]:
+        orbite = {tuple(sorted(placement.cases))}
+        orbite.update(tuple(sorted(permutation[case] for case in placement.cases)) for permutation in permutations)
+        if min(orbite) == tuple(sorted(placement.cases)):
+            representants[placement] = len(orbite)
+
+    probleme = Probleme(tables, pieces, {pivot: list(representants)})
+    # noeuds comptes sans elagage, comme dans difficulte.analyser
+    moteur = probleme.moteur(elaguer=False)
+    total = 0
+    for choix in moteur.solutions():
+        for numero_rangee in choix:
+            placement = probleme.placements[numero_rangee]
+            if placement.piece == pivot:
+                total += representants[placement]
+
+    for permutation in permutations:
+        invariants = {}
+        for index_piece in pieces:
+            invariants[index_piece] = [placement for placement in tables.placements[index_piece]
+                                       if sorted(permutation[case] for case in placement.cases) == sorted(placement.cases)]
+        total += sum(1 for _ in Probleme(tables, pieces, invariants).moteur().solutions())
+
+    return total // 4, moteur.noeuds
+
+def afficher_solution(tables, solution):
+    plateau = tables.plateau
+    grille = [["  ." if (x, y) not in plateau.cases else "  ?" for y in range(plateau.colonnes)] for x in range(plateau.lignes)]
+    for placement in solution:
+        for case in placement.cases:
+            grille[case // plateau.colonnes][case % plateau.colonnes] = f"{placement.piece + 1:3d}"
+    return "\n".join("".join(ligne) for ligne in grille)
+
+
+def afficher_plateau(plateau):
+    return "\n".join(" ".join(f"{val:2d}" for val in row) for row in plateau)
+
+
+if __name__ == "__main__":
+    arguments = sys.argv[1:]
+    tous = "--tous" in arguments
+    arguments = [arg for arg in arguments if arg != "--tous"]
+    pieces = [int(arg) - 1 for arg in arguments] if arguments else list(range(12))
+
+    debut = time.perf_counter()
+    if tous:
+        nb = 0
+        for nb, solution in enumerate(enumerer_solutions(pieces), 1):
+            if nb % 100 == 0:
+                duree = time.perf_counter() - debut
+                print(f"{nb} solutions en {duree:.2f}s ({nb / duree:.0f} solutions/s)")
+        print(f"Total : {nb} solutions en {time.perf_counter() - debut:.2f}s")
+    else:
+        solution = resoudre(pieces)
+        duree = time.perf_counter() - debut
+        if solution is None:
+            print(f"Aucune solution ({duree * 1000:.1f} ms)")
+        else:
+            print(afficher_plateau(solution))
+            print(f"Solution trouvee en {duree * 1000:.1f} ms")
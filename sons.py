@@ -0,0 +1,76 @@
+import pyxel
+
+NB_CANAUX = 4
+# Un meme son demande de nouveau sur le meme canal moins de DELAI_REPRISE images apres
+# son depart n'est pas relance (touche tenue, boucle qui le demande pour chaque piece)
+DELAI_REPRISE = 4
+
+
+class PlanificateurSons:
+    # Les scenes demandent des sons pendant update ; ils sont regroupes et envoyes a pyxel
+    # une seule fois par image, apres l'update de la scene.
+
+    def __init__(self):
+        self.demandes = []
+        self.image = 0
+        self.derniers = {}
+        self.musique = None
+        self.canaux_musique = set()
+
+    def jouer(self, canal, son):
+        if (canal, son) not in self.demandes:
+            self.demandes.append((canal, son))
+
+    def jouer_musique(self, piste):
+        if piste == self.musique:
+            return
+        pyxel.playm(piste, loop=True)
+        self.musique = piste
+        try:
+            self.canaux_musique = {canal for canal, sequence in enumerate(pyxel.musics[piste].seqs) if sequence}
+        except IndexError:
+            self.canaux_musique = set(range(NB_CANAUX))
+
+    def arreter(self):
+        # coupe tout ce qui joue ; les sons demandes dans cette image partent quand meme
+        pyxel.stop()
+        self.musique = None
+        self.canaux_musique = set()
+        self.derniers.clear()
+
+    def canaux_libres(self, occupes):
+        return [canal for canal in range(NB_CANAUX - 1, -1, -1) if canal not in self.canaux_musique and canal not in occupes]
+
+    def envoyer(self):
+        # Plusieurs sons sur le meme canal dans une image : le premier garde son canal, les
+        # suivants prennent un canal libre de la musique ; s'il n'y en a pas, ils sont joues
+        # a la suite du premier au lieu de l'interrompre.
+        self.image += 1
+        if not self.demandes:
+            return
+        par_canal = {}
+        for canal, son in self.demandes:
+            dernier = self.derniers.get(canal)
+            if dernier is not None and dernier[0] == son and self.image - dernier[1] < DELAI_REPRISE:
+                continue
+            par_canal.setdefault(canal, []).append(son)
+        self.demandes.clear()
+
+        occupes = set(par_canal)
+        for canal, sons in par_canal.items():
+            a_la_suite = [sons[0]]
+            for son in sons[1:]:
+                libres = self.canaux_libres(occupes)
+                if libres:
+                    occupes.add(libres[0])
+                    self.lancer(libres[0], son)
+                else:
+                    a_la_suite.append(son)
+            self.lancer(canal, a_la_suite[0] if len(a_la_suite) == 1 else a_la_suite)
+
+    def lancer(self, canal, son):
+        pyxel.play(canal, son)
+        self.derniers[canal] = (son if isinstance(son, int) else son[0], self.image)
+
+
+sons = PlanificateurSons()
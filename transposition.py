@@ -0,0 +1,73 @@
+import threading
+from collections import OrderedDict
+from orientations import LIGNES
+from regions import geometrie
+
+# Estimation de la place prise par une entree (cle, valeur et chainage de l'OrderedDict)
+OCTETS_PAR_ENTREE = 256
+
+class CacheLRU:
+    # Partage entre la boucle de jeu et les threads de verification : un verrou rend
+    # chaque lecture (lecture puis remise en tete) atomique face aux evictions.
+
+    def __init__(self, capacite=200000):
+        self.capacite = capacite
+        self.entrees = OrderedDict()
+        self.verrou = threading.Lock()
+        self.succes = 0
+        self.echecs = 0
+
+    def get(self, cle):
+        with self.verrou:
+            valeur = self.entrees.get(cle)
+            if valeur is None:
+                self.echecs += 1
+                return None
+            self.entrees.move_to_end(cle)
+            self.succes += 1
+            return valeur
+
+    def put(self, cle, valeur):
+        with self.verrou:
+            self.entrees[cle] = valeur
+            self.entrees.move_to_end(cle)
+            if len(self.entrees) > self.capacite:
+                self.entrees.popitem(last=False)
+
+    def __len__(self):
+        return len(self.entrees)
+
+
+def canonique(masque, colonnes, lignes=LIGNES):
+    # Representant commun des 4 etats du rectangle equivalents par symetrie
+    return geometrie(colonnes, lignes).canonique(masque)
+
+
+class TableTransposition:
+    # Memoire des etats deja resolus, partagee entre toutes les recherches.
+    # Les pieces pouvant etre tournees et retournees, un etat et ses images par
+    # symetrie ont la meme reponse : seule la forme canonique des cases vides est stockee.
+
+    def __init__(self, memoire_max=64 * 1024 * 1024):
+        self.cache = CacheLRU(max(1, memoire_max // OCTETS_PAR_ENTREE))
+
+    def cle(self, vides, pieces, colonnes, lignes=LIGNES):
+        return (lignes, colonnes, canonique(vides, colonnes, lignes), pieces)
+
+    def get(self, vides, pieces, colonnes, lignes=LIGNES):
+        return self.cache.get(self.cle(vides, pieces, colonnes, lignes))
+
+    def put(self, vides, pieces, colonnes, lignes, valeur):
+        self.cache.put(self.cle(vides, pieces, colonnes, lignes), valeur)
+
+    def __len__(self):
+        return len(self.cache)
+
+
+_table_partagee = None
+
+def table_partagee():
+    global _table_partagee
+    if _table_partagee is None:
+        _table_partagee = TableTransposition()
+    return _table_partagee
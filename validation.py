@@ -0,0 +1,42 @@
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from niveaux import grand_chelem, pieces_etape, noms_series
+from solveur import resoudre, afficher_plateau
+
+ETAPE_MIN = 4
+ETAPE_MAX = 12
+
+def plateaux_grand_chelem():
+    return [(serie, etape) for serie in range(len(grand_chelem)) for etape in range(ETAPE_MIN, ETAPE_MAX + 1)]
+
+def valider_plateau(serie, etape):
+    debut = time.perf_counter()
+    solution = resoudre(pieces_etape(serie, etape))
+    return serie, etape, solution, time.perf_counter() - debut
+
+def valider_grand_chelem(nb_processus=None, afficher=print):
+    plateaux = plateaux_grand_chelem()
+    resultats = {}
+    with ProcessPoolExecutor(max_workers=nb_processus or os.cpu_count()) as executeur:
+        taches = [executeur.submit(valider_plateau, serie, etape) for serie, etape in plateaux]
+        for tache in as_completed(taches):
+            serie, etape, solution, duree = tache.result()
+            resultats[(serie, etape)] = solution
+            etat = "OK" if solution is not None else "SANS SOLUTION"
+            afficher(f"Serie {noms_series[serie]} etape {etape:2d} : {etat} ({duree * 1000:.1f} ms)")
+            if solution is not None:
+                afficher(afficher_plateau(solution))
+    return [plateau for plateau in plateaux if resultats[plateau] is None]
+
+if __name__ == "__main__":
+    nb_processus = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    debut = time.perf_counter()
+    echecs = valider_grand_chelem(nb_processus)
+    print(f"{len(plateaux_grand_chelem())} plateaux verifies en {time.perf_counter() - debut:.2f}s")
+    if echecs:
+        for serie, etape in echecs:
+            print(f"Serie {noms_series[serie]} etape {etape} n'a pas de solution")
+        sys.exit(1)
+    print("Toutes les etapes du grand chelem ont une solution")